@@ -0,0 +1,159 @@
+"""
+How the Streamlit pages reach the model and the catalog.
+
+STELLAR_FRONTEND_MODE selects the backend:
+- "http": call the API at STELLAR_API_URL (default http://localhost:8000)
+- "embedded": load the model and catalog once per Streamlit process and call
+  the shared backend scoring and lookup functions in-process
+- "auto" (default): use the API when it answers /health, otherwise embedded
+
+Both modes return the same JSON-shaped dicts the API returns.
+"""
+import os
+import sys
+
+import requests
+import streamlit as st
+
+API_BASE_URL = os.environ.get("STELLAR_API_URL", "http://localhost:8000")
+FRONTEND_MODE = os.environ.get("STELLAR_FRONTEND_MODE", "auto")
+
+# The backend package lives at the repository root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# Same locations and overrides as the API
+DATA_PATH = os.environ.get("STELLAR_DATA_PATH", "backend/data/results.csv")
+MODEL_PATH = os.environ.get("STELLAR_MODEL_PATH", "ml-pipeline/model/catboost_model.cbm")
+
+
+class APIError(Exception):
+    """A request the backend could not serve, with the API's status code and detail."""
+
+    def __init__(self, detail: str, status_code: int = 500):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class EmbeddedBackend:
+    """The model and catalog, loaded in this process."""
+
+    def __init__(self):
+        from backend.catalog import build_catalog
+        from backend.scoring import load_catboost_model
+        from backend.snapshot import source_fingerprint
+
+        self.model, self.feature_columns, self.cat_features = load_catboost_model(MODEL_PATH)
+        # Explanations are not shown by the pages, so the catalog is built without them
+        self.catalog = build_catalog(DATA_PATH, source_fingerprint(DATA_PATH))
+
+    def health(self) -> dict:
+        return {
+            "status": "healthy",
+            "data_loaded": not self.catalog.empty,
+            "records": len(self.catalog.df),
+            "model_loaded": True,
+            "features": len(self.feature_columns),
+        }
+
+    def stats(self) -> dict:
+        if self.catalog.empty:
+            raise APIError("Dataset not loaded")
+        return self.catalog.stats
+
+    def detect(self, query: str) -> dict:
+        from backend.catalog import find_planet, planet_result
+
+        if self.catalog.empty:
+            raise APIError("Dataset not loaded")
+        search_query = query.strip()
+        position = find_planet(self.catalog, search_query)
+        if position is None:
+            raise APIError(f"Planet '{search_query}' not found. Please check the ID or name.", 404)
+        return planet_result(self.catalog, position)
+
+    def predict(self, input_data: dict) -> dict:
+        from backend.scoring import predict_one, prediction_result
+
+        probabilities = predict_one(self.model, self.feature_columns, self.cat_features, input_data)
+        return prediction_result(probabilities, input_data)
+
+    def sweep(self, payload: dict) -> dict:
+        from backend.scoring import sweep_result
+
+        parameters = [(p["name"], p["start"], p["stop"], p["steps"]) for p in payload["parameters"]]
+        try:
+            return sweep_result(self.model, self.feature_columns, self.cat_features, payload["base"], parameters)
+        except ValueError as e:
+            raise APIError(str(e), 422)
+
+
+@st.cache_resource(show_spinner="Loading model and catalog...")
+def embedded_backend() -> EmbeddedBackend:
+    """Loaded once per Streamlit process and shared by every session and page."""
+    return EmbeddedBackend()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def api_available() -> bool:
+    try:
+        return requests.get(f"{API_BASE_URL}/health", timeout=1).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+
+def mode() -> str:
+    """The backend in use: "http" or "embedded"."""
+    if FRONTEND_MODE in ("http", "embedded"):
+        return FRONTEND_MODE
+    return "http" if api_available() else "embedded"
+
+
+def mode_label() -> str:
+    """What the pages show as the active backend."""
+    if mode() == "embedded":
+        return "Embedded model (in-process)"
+    return f"API at {API_BASE_URL}"
+
+
+def _http(method: str, path: str, timeout: float = 10, **kwargs) -> dict:
+    response = requests.request(method, f"{API_BASE_URL}{path}", timeout=timeout, **kwargs)
+    if response.status_code != 200:
+        try:
+            detail = response.json().get("detail", "Unknown error")
+        except ValueError:
+            detail = response.text or "Unknown error"
+        raise APIError(detail, response.status_code)
+    return response.json()
+
+
+def health() -> dict:
+    if mode() == "embedded":
+        return embedded_backend().health()
+    return _http("GET", "/health", timeout=2)
+
+
+def stats() -> dict:
+    if mode() == "embedded":
+        return embedded_backend().stats()
+    return _http("GET", "/stats")
+
+
+def detect(query: str) -> dict:
+    if mode() == "embedded":
+        return embedded_backend().detect(query)
+    return _http("POST", "/detect", json={"query": query})
+
+
+def predict(input_data: dict) -> dict:
+    if mode() == "embedded":
+        return embedded_backend().predict(input_data)
+    return _http("POST", "/predict", json=input_data)
+
+
+def sweep(payload: dict) -> dict:
+    if mode() == "embedded":
+        return embedded_backend().sweep(payload)
+    return _http("POST", "/predict/sweep", json=payload, timeout=30)
@@ -1,11 +1,13 @@
 import streamlit as st
 import requests
+import time
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-# API Configuration
-API_BASE_URL = "http://localhost:8000"
+# Lookups go over HTTP or in-process (see Frontend/client.py); batch jobs always need the API
+import client
+API_BASE_URL = client.API_BASE_URL
 
 # Page Styling
 st.set_page_config(
@@ -63,21 +65,19 @@ st.markdown("""
 st.title("Upload & Detect")
 st.markdown("### Search for exoplanet candidates by ID or name")
 
-# Check API health
+# Check backend health
 try:
-    health_response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-    if health_response.status_code == 200:
-        health_data = health_response.json()
-        if health_data.get("status") == "healthy":
-            st.success(f"API Connected | {health_data.get('records', 0)} planets in database")
-        else:
-            st.warning("API connected but data not loaded")
+    health_data = client.health()
+    if health_data.get("status") == "healthy":
+        st.success(f"{client.mode_label()} | {health_data.get('records', 0)} planets in database")
     else:
-        st.error("API is not responding properly")
+        st.warning(f"{client.mode_label()} | data not loaded")
+except client.APIError:
+    st.error(f"{client.mode_label()} is not responding properly")
 except requests.exceptions.ConnectionError:
     st.error("Cannot connect to API. Make sure the backend is running on http://localhost:8000")
 except Exception as e:
-    st.error(f"Error: {str(e)}")
+    st.error(f"{client.mode_label()} | Error: {str(e)}")
 
 # Input Section
 st.markdown("---")
@@ -97,21 +97,19 @@ with col2:
 
 # Display Statistics
 try:
-    stats_response = requests.get(f"{API_BASE_URL}/stats")
-    if stats_response.status_code == 200:
-        stats = stats_response.json()
-        
-        st.markdown("### Database Statistics")
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Total Objects", f"{stats['total_objects']:,}")
-        with col2:
-            st.metric("Confirmed Candidates", stats['confirmed_candidates'])
-        with col3:
-            st.metric("False Positives", stats['false_positives'])
-        with col4:
-            st.metric("Avg Probability", f"{stats['average_probability']:.2%}")
+    stats = client.stats()
+    
+    st.markdown("### Database Statistics")
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Objects", f"{stats['total_objects']:,}")
+    with col2:
+        st.metric("Confirmed Candidates", stats['confirmed_candidates'])
+    with col3:
+        st.metric("False Positives", stats['false_positives'])
+    with col4:
+        st.metric("Avg Probability", f"{stats['average_probability']:.2%}")
 except:
     pass
 
@@ -119,121 +117,114 @@ except:
 if search_button and planet_query:
     with st.spinner("Analyzing planet data..."):
         try:
-            response = requests.post(
-                f"{API_BASE_URL}/detect",
-                json={"query": planet_query},
-                timeout=10
-            )
+            result = client.detect(planet_query)
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Display Results
-                st.markdown("---")
-                st.markdown("### Detection Results")
-                
-               
-                
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.markdown(f"### {result['name']}")
-                    st.markdown(f"**ID:** {result['id']}")
-                    st.markdown(f"**Disposition:** {result['predicted_disposition']}")
-                    
-                    if result['is_confirmed']:
-                        st.markdown('<p class="confirmed">CONFIRMED CANDIDATE</p>', unsafe_allow_html=True)
-                    else:
-                        st.markdown('<p class="false-positive">FALSE POSITIVE</p>', unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown("### Probability")
-                    prob_percent = result['probability_confirmed'] * 100
-                    st.markdown(f'<p class="probability">{prob_percent:.1f}%</p>', unsafe_allow_html=True)
-                    st.markdown(f"**Confidence:** {result['confidence_level']}")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Probability Gauge
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number+delta",
-                    value=prob_percent,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Confirmation Probability", 'font': {'size': 24, 'color': 'white'}},
-                    delta={'reference': 50, 'increasing': {'color': "#00FF88"}},
-                    gauge={
-                        'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "white"},
-                        'bar': {'color': "#FFD700"},
-                        'bgcolor': "rgba(0,0,0,0.3)",
-                        'borderwidth': 2,
-                        'bordercolor': "white",
-                        'steps': [
-                            {'range': [0, 50], 'color': 'rgba(255, 107, 107, 0.3)'},
-                            {'range': [50, 80], 'color': 'rgba(255, 215, 0, 0.3)'},
-                            {'range': [80, 100], 'color': 'rgba(0, 255, 136, 0.3)'}
-                        ],
-                        'threshold': {
-                            'line': {'color': "white", 'width': 4},
-                            'thickness': 0.75,
-                            'value': 50
-                        }
-                    }
-                ))
-                
-                fig.update_layout(
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    font={'color': "white", 'family': "Arial"},
-                    height=300
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Additional Information
-                st.markdown("### Interpretation")
+            # Display Results
+            st.markdown("---")
+            st.markdown("### Detection Results")
+            
+           
+            
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                st.markdown(f"### {result['name']}")
+                st.markdown(f"**ID:** {result['id']}")
+                st.markdown(f"**Disposition:** {result['predicted_disposition']}")
                 
-                if result['probability_confirmed'] >= 0.75:
-                    st.info("**High Confidence**: This object shows strong characteristics of an exoplanet candidate. Further validation recommended.")
-                elif result['probability_confirmed'] >= 0.5:
-                    st.warning("**Medium Confidence**: This object shows some exoplanet-like characteristics but requires additional analysis.")
+                if result['is_confirmed']:
+                    st.markdown('<p class="confirmed">CONFIRMED CANDIDATE</p>', unsafe_allow_html=True)
                 else:
-                    st.error("**Low Confidence**: This object is likely a false positive. Transit signal may be caused by stellar activity or instrumental noise.")
-                
-                # Comparison Chart
-                st.markdown("### Probability Distribution")
-                
-                fig2 = go.Figure()
-                
-                categories = ['This Planet', 'Average', 'High Threshold']
-                values = [prob_percent, 50, 75]
-                colors = ['#FFD700', '#6C63FF', '#00FF88']
-                
-                fig2.add_trace(go.Bar(
-                    x=categories,
-                    y=values,
-                    marker_color=colors,
-                    text=[f"{v:.1f}%" for v in values],
-                    textposition='outside'
-                ))
-                
-                fig2.update_layout(
-                    title="Probability Comparison",
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(20,20,30,0.8)",
-                    font={'color': "white"},
-                    yaxis={'title': 'Probability (%)', 'range': [0, 100]},
-                    showlegend=False,
-                    height=400
-                )
-                
-                st.plotly_chart(fig2, use_container_width=True)
-                
-            elif response.status_code == 404:
+                    st.markdown('<p class="false-positive">FALSE POSITIVE</p>', unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown("### Probability")
+                prob_percent = result['probability_confirmed'] * 100
+                st.markdown(f'<p class="probability">{prob_percent:.1f}%</p>', unsafe_allow_html=True)
+                st.markdown(f"**Confidence:** {result['confidence_level']}")
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+            
+            # Probability Gauge
+            fig = go.Figure(go.Indicator(
+                mode="gauge+number+delta",
+                value=prob_percent,
+                domain={'x': [0, 1], 'y': [0, 1]},
+                title={'text': "Confirmation Probability", 'font': {'size': 24, 'color': 'white'}},
+                delta={'reference': 50, 'increasing': {'color': "#00FF88"}},
+                gauge={
+                    'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "white"},
+                    'bar': {'color': "#FFD700"},
+                    'bgcolor': "rgba(0,0,0,0.3)",
+                    'borderwidth': 2,
+                    'bordercolor': "white",
+                    'steps': [
+                        {'range': [0, 50], 'color': 'rgba(255, 107, 107, 0.3)'},
+                        {'range': [50, 80], 'color': 'rgba(255, 215, 0, 0.3)'},
+                        {'range': [80, 100], 'color': 'rgba(0, 255, 136, 0.3)'}
+                    ],
+                    'threshold': {
+                        'line': {'color': "white", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 50
+                    }
+                }
+            ))
+            
+            fig.update_layout(
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                font={'color': "white", 'family': "Arial"},
+                height=300
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Additional Information
+            st.markdown("### Interpretation")
+            
+            if result['probability_confirmed'] >= 0.75:
+                st.info("**High Confidence**: This object shows strong characteristics of an exoplanet candidate. Further validation recommended.")
+            elif result['probability_confirmed'] >= 0.5:
+                st.warning("**Medium Confidence**: This object shows some exoplanet-like characteristics but requires additional analysis.")
+            else:
+                st.error("**Low Confidence**: This object is likely a false positive. Transit signal may be caused by stellar activity or instrumental noise.")
+            
+            # Comparison Chart
+            st.markdown("### Probability Distribution")
+            
+            fig2 = go.Figure()
+            
+            categories = ['This Planet', 'Average', 'High Threshold']
+            values = [prob_percent, 50, 75]
+            colors = ['#FFD700', '#6C63FF', '#00FF88']
+            
+            fig2.add_trace(go.Bar(
+                x=categories,
+                y=values,
+                marker_color=colors,
+                text=[f"{v:.1f}%" for v in values],
+                textposition='outside'
+            ))
+            
+            fig2.update_layout(
+                title="Probability Comparison",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(20,20,30,0.8)",
+                font={'color': "white"},
+                yaxis={'title': 'Probability (%)', 'range': [0, 100]},
+                showlegend=False,
+                height=400
+            )
+            
+            st.plotly_chart(fig2, use_container_width=True)
+            
+        except client.APIError as e:
+            if e.status_code == 404:
                 st.error("Planet not found. Please check the ID or name and try again.")
                 st.info("**Tip**: Try searching with the full KOI name (e.g., K00753.01) or numeric ID.")
             else:
-                st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
-                
+                st.error(f"Error: {e.detail}")
         except requests.exceptions.ConnectionError:
             st.error("Cannot connect to API. Make sure the backend is running.")
             st.code("cd backend\npython -m uvicorn main:app --reload", language="bash")
@@ -245,6 +236,86 @@ if search_button and planet_query:
 elif search_button and not planet_query:
     st.warning("Please enter a planet ID or name to search.")
 
+# Batch Scoring Section
+st.markdown("---")
+st.markdown("### Batch Scoring")
+st.write("Upload a CSV of KOI parameters to score it in the background. Large files are processed in chunks.")
+if client.mode() == "embedded":
+    st.info("Batch scoring jobs run on the API server. Start the backend to use them.")
+
+batch_file = st.file_uploader("Upload CSV for scoring", type=["csv"])
+submit_job_button = st.button("Submit Scoring Job", disabled=batch_file is None)
+
+if submit_job_button and batch_file is not None:
+    try:
+        response = requests.post(
+            f"{API_BASE_URL}/jobs/predict_csv",
+            files={"file": (batch_file.name, batch_file.getvalue(), "text/csv")},
+            timeout=300
+        )
+        if response.status_code == 200:
+            st.session_state["scoring_job_id"] = response.json()["job_id"]
+        else:
+            st.error(f"Error: {response.json().get('detail', 'Unknown error')}")
+    except requests.exceptions.ConnectionError:
+        st.error("Cannot connect to API. Make sure the backend is running.")
+    except Exception as e:
+        st.error(f" An error occurred: {str(e)}")
+
+job_id = st.session_state.get("scoring_job_id")
+if job_id:
+    st.markdown(f"**Job ID:** `{job_id}`")
+    # Finished jobs are kept in the session, so later reruns of the page do not poll again
+    job = st.session_state.get("scoring_job")
+    if job is None or job["job_id"] != job_id:
+        job = None
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+        try:
+            while True:
+                job_response = requests.get(f"{API_BASE_URL}/jobs/{job_id}", timeout=5)
+                if job_response.status_code != 200:
+                    st.error(f"Error: {job_response.json().get('detail', 'Unknown error')}")
+                    break
+                job = job_response.json()
+                progress_bar.progress(job["progress"])
+                status_text.write(
+                    f"Status: **{job['status']}** | "
+                    f"{job['processed_rows']:,} rows scored ({job['progress']:.0%} of the file)"
+                )
+                if job["status"] in ("completed", "failed"):
+                    st.session_state["scoring_job"] = job
+                    break
+                time.sleep(1)
+        except requests.exceptions.ConnectionError:
+            st.error("Cannot connect to API. Make sure the backend is running.")
+
+    if job and job["status"] == "completed":
+        st.success(f"Scored {job['total_rows']:,} rows | {job['confirmed_count']:,} confirmed candidates")
+        # The scored file can be hundreds of MB: fetched once, on request, and kept for this job only
+        result = st.session_state.get("scoring_job_result")
+        if result is None or result[0] != job_id:
+            result = None
+            if st.button("Prepare Scored CSV"):
+                try:
+                    result_response = requests.get(f"{API_BASE_URL}/jobs/{job_id}/result", timeout=300)
+                    if result_response.status_code == 200:
+                        result = (job_id, result_response.content)
+                        st.session_state["scoring_job_result"] = result
+                    else:
+                        st.error(f"Error: {result_response.json().get('detail', 'Unknown error')}")
+                except requests.exceptions.ConnectionError:
+                    st.error("Cannot connect to API. Make sure the backend is running.")
+        if result is not None:
+            st.download_button(
+                label="Download Scored CSV",
+                data=result[1],
+                file_name=f"scored_{job['filename'] or 'predictions.csv'}",
+                mime="text/csv"
+            )
+    elif job and job["status"] == "failed":
+        st.error(f"Job failed: {job.get('error') or 'Unknown error'}")
+
 # Sample Planets Section
 st.markdown("---")
 st.markdown("### Sample Planets to Try")
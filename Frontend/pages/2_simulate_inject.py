@@ -4,8 +4,8 @@ import io
 import requests
 import plotly.graph_objects as go
 
-# API Configuration
-API_BASE_URL = "http://localhost:8000"
+# Model access over HTTP or in-process (see Frontend/client.py)
+import client
 
 # --- Page Styling ---
 
@@ -60,19 +60,20 @@ st.markdown("""
 st.title("Simulate & Inject")
 st.write("Provide **parameters** to generate a synthetic dataset and get AI predictions.")
 
-# Check API health
+# Check model health
 try:
-    health_response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-    if health_response.status_code == 200:
-        health_data = health_response.json()
-        if health_data.get("model_loaded"):
-            st.success(f"✅ AI Model Ready | {health_data.get('features', 0)} features loaded")
-        else:
-            st.warning("⚠️ Model not loaded. Prediction unavailable.")
+    health_data = client.health()
+    if health_data.get("model_loaded"):
+        st.success(f"✅ AI Model Ready | {health_data.get('features', 0)} features loaded | {client.mode_label()}")
     else:
-        st.error("❌ API is not responding properly")
+        st.warning("⚠️ Model not loaded. Prediction unavailable.")
+except client.APIError:
+    st.error(f"❌ {client.mode_label()} is not responding properly")
 except:
-    st.error("❌ Cannot connect to API. Make sure the backend is running.")
+    if client.mode() == "embedded":
+        st.error("❌ Could not load the embedded model. Check STELLAR_MODEL_PATH and STELLAR_DATA_PATH.")
+    else:
+        st.error("❌ Cannot connect to API. Make sure the backend is running.")
 
 st.markdown("---")
 
@@ -128,132 +129,205 @@ data = {
 
 df = pd.DataFrame(data)
 
+# Prepare data for API (API expects koi_ prefix)
+input_data = {
+    "koi_period": period,
+    "koi_time0bk": time0bk,
+    "koi_impact": impact,
+    "koi_duration": duration,
+    "koi_depth": depth,
+    "koi_prad": prad,
+    "koi_model_snr": model_snr,
+    "koi_steff": steff,
+    "koi_slogg": slogg,
+    "koi_srad": srad,
+    "koi_kepmag": kepmag,
+}
+
 # --- Predict with AI ---
 if predict_button:
     with st.spinner("Running AI prediction..."):
         try:
-            # Prepare data for API (API expects koi_ prefix)
-            input_data = {
-                "koi_period": period,
-                "koi_time0bk": time0bk,
-                "koi_impact": impact,
-                "koi_duration": duration,
-                "koi_depth": depth,
-                "koi_prad": prad,
-                "koi_model_snr": model_snr,
-                "koi_steff": steff,
-                "koi_slogg": slogg,
-                "koi_srad": srad,
-                "koi_kepmag": kepmag,
-            }
+            # Call prediction API (or the embedded model)
+            result = client.predict(input_data)
             
-            # Call prediction API
-            response = requests.post(
-                f"{API_BASE_URL}/predict",
-                json=input_data,
-                timeout=10
-            )
+            st.markdown("---")
+            st.markdown("##  AI Prediction Results")
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                st.markdown("---")
-                st.markdown("##  AI Prediction Results")
-                
-                
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    if result['is_confirmed']:
-                        st.markdown('<p class="confirmed">✅ CONFIRMED CANDIDATE</p>', unsafe_allow_html=True)
-                        st.markdown(f"**Prediction:** {result['prediction']}")
-                    else:
-                        st.markdown('<p class="false-positive">❌ FALSE POSITIVE</p>', unsafe_allow_html=True)
-                        st.markdown(f"**Prediction:** {result['prediction']}")
-                    
-                    st.markdown(f"**Confidence Level:** {result['confidence_level']}")
-                
-                with col2:
-                    st.metric("Candidate Probability", f"{result['probability_candidate']*100:.1f}%")
-                    st.metric("False Positive Probability", f"{result['probability_false_positive']*100:.1f}%")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Probability Gauge
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=result['probability_candidate'] * 100,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Candidate Probability", 'font': {'size': 24, 'color': 'white'}},
-                    gauge={
-                        'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "white"},
-                        'bar': {'color': "#FFD700"},
-                        'bgcolor': "rgba(0,0,0,0.3)",
-                        'borderwidth': 2,
-                        'bordercolor': "white",
-                        'steps': [
-                            {'range': [0, 50], 'color': 'rgba(255, 107, 107, 0.3)'},
-                            {'range': [50, 75], 'color': 'rgba(255, 215, 0, 0.3)'},
-                            {'range': [75, 100], 'color': 'rgba(0, 255, 136, 0.3)'}
-                        ],
-                        'threshold': {
-                            'line': {'color': "white", 'width': 4},
-                            'thickness': 0.75,
-                            'value': 50
-                        }
-                    }
-                ))
-                
-                fig.update_layout(
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(0,0,0,0)",
-                    font={'color': "white", 'family': "Arial"},
-                    height=300
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Interpretation
-                st.markdown("###  AI Interpretation")
-                
-                prob_percent = result['probability_candidate'] * 100
-                
-                if prob_percent >= 75:
-                    st.success(" **High Confidence Detection**: This signal shows strong characteristics of an exoplanet transit. The AI model is highly confident this is a genuine planetary candidate.")
-                elif prob_percent >= 50:
-                    st.warning(" **Medium Confidence**: The signal shows some exoplanet-like characteristics, but additional validation is recommended. Consider checking for stellar activity or instrumental artifacts.")
+            
+            col1, col2 = st.columns([2, 1])
+            
+            with col1:
+                if result['is_confirmed']:
+                    st.markdown('<p class="confirmed">✅ CONFIRMED CANDIDATE</p>', unsafe_allow_html=True)
+                    st.markdown(f"**Prediction:** {result['prediction']}")
                 else:
-                    st.error(" **Likely False Positive**: The AI model suggests this signal is probably not a genuine planetary transit. It may be caused by stellar variability, eclipsing binaries, or instrumental noise.")
-                
-                # Comparison Chart
-                st.markdown("###  Probability Breakdown")
+                    st.markdown('<p class="false-positive">❌ FALSE POSITIVE</p>', unsafe_allow_html=True)
+                    st.markdown(f"**Prediction:** {result['prediction']}")
                 
-                fig2 = go.Figure(data=[
-                    go.Bar(
-                        x=['False Positive', 'Candidate'],
-                        y=[result['probability_false_positive'] * 100, result['probability_candidate'] * 100],
-                        marker_color=['#FF6B6B', '#00FF88'],
-                        text=[f"{result['probability_false_positive']*100:.1f}%", 
-                              f"{result['probability_candidate']*100:.1f}%"],
-                        textposition='outside'
-                    )
-                ])
-                
-                fig2.update_layout(
-                    title="Classification Probabilities",
-                    yaxis={'title': 'Probability (%)', 'range': [0, 100]},
-                    paper_bgcolor="rgba(0,0,0,0)",
-                    plot_bgcolor="rgba(20,20,30,0.8)",
-                    font={'color': "white"},
-                    showlegend=False,
-                    height=400
+                st.markdown(f"**Confidence Level:** {result['confidence_level']}")
+            
+            with col2:
+                st.metric("Candidate Probability", f"{result['probability_candidate']*100:.1f}%")
+                st.metric("False Positive Probability", f"{result['probability_false_positive']*100:.1f}%")
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+            
+            # Probability Gauge
+            fig = go.Figure(go.Indicator(
+                mode="gauge+number",
+                value=result['probability_candidate'] * 100,
+                domain={'x': [0, 1], 'y': [0, 1]},
+                title={'text': "Candidate Probability", 'font': {'size': 24, 'color': 'white'}},
+                gauge={
+                    'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "white"},
+                    'bar': {'color': "#FFD700"},
+                    'bgcolor': "rgba(0,0,0,0.3)",
+                    'borderwidth': 2,
+                    'bordercolor': "white",
+                    'steps': [
+                        {'range': [0, 50], 'color': 'rgba(255, 107, 107, 0.3)'},
+                        {'range': [50, 75], 'color': 'rgba(255, 215, 0, 0.3)'},
+                        {'range': [75, 100], 'color': 'rgba(0, 255, 136, 0.3)'}
+                    ],
+                    'threshold': {
+                        'line': {'color': "white", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 50
+                    }
+                }
+            ))
+            
+            fig.update_layout(
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(0,0,0,0)",
+                font={'color': "white", 'family': "Arial"},
+                height=300
+            )
+            
+            st.plotly_chart(fig, use_container_width=True)
+            
+            # Interpretation
+            st.markdown("###  AI Interpretation")
+            
+            prob_percent = result['probability_candidate'] * 100
+            
+            if prob_percent >= 75:
+                st.success(" **High Confidence Detection**: This signal shows strong characteristics of an exoplanet transit. The AI model is highly confident this is a genuine planetary candidate.")
+            elif prob_percent >= 50:
+                st.warning(" **Medium Confidence**: The signal shows some exoplanet-like characteristics, but additional validation is recommended. Consider checking for stellar activity or instrumental artifacts.")
+            else:
+                st.error(" **Likely False Positive**: The AI model suggests this signal is probably not a genuine planetary transit. It may be caused by stellar variability, eclipsing binaries, or instrumental noise.")
+            
+            # Comparison Chart
+            st.markdown("###  Probability Breakdown")
+            
+            fig2 = go.Figure(data=[
+                go.Bar(
+                    x=['False Positive', 'Candidate'],
+                    y=[result['probability_false_positive'] * 100, result['probability_candidate'] * 100],
+                    marker_color=['#FF6B6B', '#00FF88'],
+                    text=[f"{result['probability_false_positive']*100:.1f}%", 
+                          f"{result['probability_candidate']*100:.1f}%"],
+                    textposition='outside'
                 )
-                
-                st.plotly_chart(fig2, use_container_width=True)
-                
+            ])
+            
+            fig2.update_layout(
+                title="Classification Probabilities",
+                yaxis={'title': 'Probability (%)', 'range': [0, 100]},
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(20,20,30,0.8)",
+                font={'color': "white"},
+                showlegend=False,
+                height=400
+            )
+            
+            st.plotly_chart(fig2, use_container_width=True)
+            
+        except client.APIError as e:
+            st.error(f"❌ Prediction failed: {e.detail}")
+        except requests.exceptions.ConnectionError:
+            st.error("❌ Cannot connect to API. Make sure the backend is running.")
+        except Exception as e:
+            st.error(f"❌ An error occurred: {str(e)}")
+
+# --- Sensitivity Analysis ---
+st.markdown("---")
+st.subheader("Sensitivity Analysis")
+st.write("See how the candidate probability changes when one or two parameters vary around the current inputs.")
+
+# Sweep ranges match the input widget limits
+sweep_ranges = {
+    "koi_period": (0.1, 1000.0),
+    "koi_time0bk": (0.0, 5000.0),
+    "koi_impact": (0.0, 1.0),
+    "koi_duration": (0.1, 72.0),
+    "koi_depth": (10.0, 100000.0),
+    "koi_prad": (0.1, 20.0),
+    "koi_model_snr": (0.1, 1000.0),
+    "koi_steff": (2000.0, 10000.0),
+    "koi_slogg": (0.0, 10.0),
+    "koi_srad": (0.1, 50.0),
+    "koi_kepmag": (5.0, 20.0),
+}
+
+sweep_col1, sweep_col2, sweep_col3 = st.columns(3)
+with sweep_col1:
+    sweep_x = st.selectbox("Parameter", list(sweep_ranges), index=2)
+with sweep_col2:
+    sweep_y = st.selectbox("Second parameter (optional)", ["None"] + [p for p in sweep_ranges if p != sweep_x])
+with sweep_col3:
+    sweep_steps = st.slider("Steps", 5, 100, 40)
+
+sweep_button = st.button("Run Sensitivity Sweep", use_container_width=True)
+
+if sweep_button:
+    sweep_params = [sweep_x] if sweep_y == "None" else [sweep_x, sweep_y]
+    payload = {
+        "base": input_data,
+        "parameters": [
+            {"name": name, "start": sweep_ranges[name][0], "stop": sweep_ranges[name][1], "steps": sweep_steps}
+            for name in sweep_params
+        ],
+    }
+    with st.spinner("Scoring parameter grid..."):
+        try:
+            sweep = client.sweep(payload)
+            axes = sweep["parameters"]
+            surface = sweep["probability_candidate"]
+
+            if len(axes) == 1:
+                fig3 = go.Figure(go.Scatter(
+                    x=axes[0]["values"],
+                    y=[p * 100 for p in surface],
+                    mode="lines",
+                    line={'color': "#FFD700", 'width': 3}
+                ))
+                fig3.add_vline(x=input_data[axes[0]["name"]], line_dash="dash", line_color="white")
+                fig3.update_layout(xaxis={'title': axes[0]["name"]}, yaxis={'title': 'Candidate Probability (%)', 'range': [0, 100]})
             else:
-                st.error(f"❌ Prediction failed: {response.json().get('detail', 'Unknown error')}")
-                
+                fig3 = go.Figure(go.Heatmap(
+                    x=axes[1]["values"],
+                    y=axes[0]["values"],
+                    z=[[p * 100 for p in row] for row in surface],
+                    colorscale="Viridis",
+                    zmin=0,
+                    zmax=100,
+                    colorbar={'title': 'Candidate %'}
+                ))
+                fig3.update_layout(xaxis={'title': axes[1]["name"]}, yaxis={'title': axes[0]["name"]})
+
+            fig3.update_layout(
+                title="Candidate Probability Sensitivity",
+                paper_bgcolor="rgba(0,0,0,0)",
+                plot_bgcolor="rgba(20,20,30,0.8)",
+                font={'color': "white"},
+                height=450
+            )
+            st.plotly_chart(fig3, use_container_width=True)
+        except client.APIError as e:
+            st.error(f"❌ Sweep failed: {e.detail}")
         except requests.exceptions.ConnectionError:
             st.error("❌ Cannot connect to API. Make sure the backend is running.")
         except Exception as e:
@@ -0,0 +1,248 @@
+"""
+Admission control for expensive endpoints.
+
+Each limited route group has a concurrency limit and a bounded wait queue.
+Requests beyond both are rejected immediately with 503 and Retry-After,
+before their body is read. Queued and running requests whose client has
+disconnected before the response was complete are cancelled. Work already
+handed to the threadpool cannot be interrupted, so a cancelled request keeps
+its slot until that thread has finished. Routes without a limit (the cheap
+lookups and health probes) are never queued behind expensive work.
+
+Implemented as plain ASGI middleware so that it can watch for client
+disconnects while a request waits, without losing any of the request body.
+"""
+import asyncio
+import json
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+import anyio
+
+# Request body bytes buffered while a request waits in the queue, so that a
+# client disconnect can still be noticed; larger uploads stop being read
+# (and rely on TCP backpressure) until the request is admitted.
+MAX_QUEUED_BODY_BYTES = 1024 * 1024
+
+
+class AdmissionLimit:
+    """Concurrency limit plus bounded FIFO wait queue for a group of routes."""
+
+    def __init__(self, paths: Iterable[str], max_concurrent: int, max_queue: int,
+                 retry_after: int = 5, queue_timeout: float = 30.0):
+        self.paths = set(paths)
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def has_room(self) -> bool:
+        return self.active < self.max_concurrent or self.waiting < self.max_queue
+
+    async def acquire(self, disconnected: asyncio.Event) -> Optional[str]:
+        """
+        Wait for a slot. Returns None when admitted, otherwise the reason
+        ("timeout" or "disconnected").
+        """
+        self.waiting += 1
+        acquire_task = asyncio.ensure_future(self._semaphore.acquire())
+        disconnect_task = asyncio.ensure_future(disconnected.wait())
+        try:
+            await asyncio.wait({acquire_task, disconnect_task}, timeout=self.queue_timeout,
+                                return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self.waiting -= 1
+            disconnect_task.cancel()
+            acquire_task.cancel()
+
+        if acquire_task.done() and not acquire_task.cancelled():
+            if disconnected.is_set():
+                self._semaphore.release()
+                self.cancelled += 1
+                return "disconnected"
+            self.active += 1
+            self.admitted += 1
+            return None
+
+        if disconnected.is_set():
+            self.cancelled += 1
+            return "disconnected"
+        self.timed_out += 1
+        return "timeout"
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def metrics(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, AdmissionLimit]):
+        self.limits = limits
+        self._by_path = {path: limit for limit in limits.values() for path in limit.paths}
+
+    def limit_for(self, path: str) -> Optional[AdmissionLimit]:
+        return self._by_path.get(path)
+
+    def metrics(self) -> Dict:
+        return {name: limit.metrics() for name, limit in self.limits.items()}
+
+    def is_busy(self) -> bool:
+        """True while any group is at its concurrency limit or has requests waiting."""
+        return any(limit.waiting or limit.active >= limit.max_concurrent for limit in self.limits.values())
+
+    @property
+    def total_concurrency(self) -> int:
+        return sum(limit.max_concurrent for limit in self.limits.values())
+
+
+class _ClientChannel:
+    """
+    Single reader of a request's ASGI receive channel. Body messages are
+    buffered for the application; a disconnect is recorded as an event.
+    """
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._watcher = None
+        self.body_complete = False
+        self.disconnected = asyncio.Event()
+
+    async def _read(self) -> Dict:
+        message = await self._receive()
+        if message["type"] == "http.disconnect":
+            self.disconnected.set()
+        elif not message.get("more_body", False):
+            self.body_complete = True
+        return message
+
+    async def _watch(self, max_buffer: int):
+        # Buffer the (small) body, then wait for the client to go away
+        while not self.body_complete and not self.disconnected.is_set() and self._buffered_bytes < max_buffer:
+            message = await self._read()
+            if message["type"] == "http.request":
+                self._buffer.append(message)
+                self._buffered_bytes += len(message.get("body", b""))
+        while self.body_complete and not self.disconnected.is_set():
+            await self._read()
+
+    def start_watching(self, max_buffer: int = MAX_QUEUED_BODY_BYTES):
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.ensure_future(self._watch(max_buffer))
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    async def receive(self) -> Dict:
+        """Receive callable handed to the application."""
+        if self._buffer:
+            return self._buffer.popleft()
+        if self.disconnected.is_set():
+            return {"type": "http.disconnect"}
+        if not self.body_complete:
+            # The watcher stopped at its buffer cap; read the rest directly
+            message = await self._read()
+            if self.body_complete:
+                self.start_watching()
+            return message
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = self.controller.limit_for(scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        if not limit.has_room():
+            limit.rejected += 1
+            return await self._reject(send, limit)
+
+        channel = _ClientChannel(receive)
+        channel.start_watching()
+        reason = await limit.acquire(channel.disconnected)
+        if reason == "disconnected":
+            channel.stop_watching()
+            return
+        if reason == "timeout":
+            channel.stop_watching()
+            return await self._reject(send, limit)
+
+        if not channel.body_complete:
+            # Hand the rest of the body to the application; watching resumes once it is read
+            channel.stop_watching()
+
+        response_complete = False
+        cancel_scope = anyio.CancelScope()
+
+        async def send_tracked(message):
+            nonlocal response_complete
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+
+        async def run_app():
+            # Cancelled through anyio rather than Task.cancel(): run_in_threadpool shields
+            # itself from anyio cancellation, so the app only stops once its thread is done
+            with cancel_scope:
+                await self.app(scope, channel.receive, send_tracked)
+
+        app_task = asyncio.ensure_future(run_app())
+        disconnect_task = asyncio.ensure_future(channel.disconnected.wait())
+        try:
+            await asyncio.wait({app_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not app_task.done() and not response_complete:
+                # Client went away mid-request: stop working on it
+                limit.cancelled += 1
+                cancel_scope.cancel()
+            # The slot is held until the application, and any thread it started, has returned
+            await app_task
+        finally:
+            disconnect_task.cancel()
+            channel.stop_watching()
+            limit.release()
+
+    @staticmethod
+    async def _reject(send, limit: AdmissionLimit):
+        body = json.dumps({"detail": "Server busy, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(limit.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,68 @@
+"""
+Arrow IPC stream input and output for batch prediction.
+
+Feature columns are read straight from the Arrow buffers as NumPy views
+(no Python objects per value) and written into a single row-major float32
+matrix, which is the layout CatBoost scores from. Results go back as an
+Arrow record batch stream. pyarrow is imported lazily; it is only needed
+when /predict_arrow is used.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+LABELS = ["FALSE POSITIVE", "CANDIDATE"]
+
+
+def read_feature_columns(body: bytes, feature_columns) -> Tuple[List[np.ndarray], int]:
+    """
+    Read an Arrow IPC stream and return one float32 array per model feature.
+    Features missing from the stream are filled with 0, like prepare_input.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    n_rows = table.num_rows
+
+    columns = []
+    for name in feature_columns:
+        if name not in table.column_names:
+            columns.append(np.zeros(n_rows, dtype=np.float32))
+            continue
+        column = table.column(name).combine_chunks()
+        if not pa.types.is_floating(column.type) and not pa.types.is_integer(column.type):
+            raise ValueError(f"Column '{name}' must be numeric, got {column.type}")
+        # Zero-copy view when the column has no nulls; nulls become NaN otherwise
+        values = column.to_numpy(zero_copy_only=column.null_count == 0)
+        columns.append(values.astype(np.float32, copy=False))
+    return columns, n_rows
+
+
+def stack_columns(columns: List[np.ndarray]) -> np.ndarray:
+    """Row-major float32 matrix, filled column by column."""
+    matrix = np.empty((len(columns[0]) if columns else 0, len(columns)), dtype=np.float32)
+    for j, column in enumerate(columns):
+        matrix[:, j] = column
+    return matrix
+
+
+def write_predictions(probabilities: np.ndarray) -> bytes:
+    """Arrow IPC stream with probabilities, dictionary-encoded labels and is_confirmed."""
+    import pyarrow as pa
+
+    is_confirmed = probabilities[:, 1] > 0.5
+    batch = pa.record_batch(
+        [
+            pa.array(probabilities[:, 0]),
+            pa.array(probabilities[:, 1]),
+            pa.DictionaryArray.from_arrays(pa.array(is_confirmed.astype(np.int8)), pa.array(LABELS)),
+            pa.array(is_confirmed),
+        ],
+        names=["probability_false_positive", "probability_candidate", "prediction", "is_confirmed"],
+    )
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,96 @@
+"""
+Measure API cold start: time until /health/ready answers 200 and time until
+the first /predict response, from launching a fresh uvicorn process.
+
+Run from the repository root:
+    python -m backend.benchmarks.cold_start --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SAMPLE_INPUT = {
+    "koi_period": 7.5,
+    "koi_time0bk": 134.2,
+    "koi_impact": 0.1,
+    "koi_duration": 2.3,
+    "koi_depth": 350.0,
+    "koi_prad": 1.2,
+    "koi_model_snr": 12.7,
+    "koi_steff": 5778,
+    "koi_slogg": 4.4,
+    "koi_srad": 1.0,
+    "koi_kepmag": 12.1,
+}
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _post_json(url: str, payload: dict) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.load(response)
+
+
+def measure_once(port: int, timeout: float):
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        while _status(f"{base_url}/health/ready") != 200:
+            if server.poll() is not None or time.perf_counter() - started > timeout:
+                raise RuntimeError("API did not become ready")
+            time.sleep(0.02)
+        ready = time.perf_counter() - started
+
+        request_started = time.perf_counter()
+        _post_json(f"{base_url}/predict", SAMPLE_INPUT)
+        first_request = time.perf_counter() - request_started
+
+        with urllib.request.urlopen(f"{base_url}/health", timeout=5) as response:
+            reported = json.load(response).get("startup_seconds")
+        return ready, first_request, reported
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    print(f"{'run':>3}  {'ready (s)':>9}  {'first /predict (ms)':>19}  {'reported startup (s)':>20}")
+    readies, firsts = [], []
+    for run in range(1, args.runs + 1):
+        ready, first_request, reported = measure_once(args.port, args.timeout)
+        readies.append(ready)
+        firsts.append(first_request)
+        print(f"{run:>3}  {ready:9.3f}  {first_request * 1000:19.1f}  {reported:>20}")
+
+    print(f"median time-to-ready {statistics.median(readies):.3f}s, "
+          f"median first /predict {statistics.median(firsts) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure scaling of sharded batch inference.
+
+Scores the same synthetic batch with the in-process single-call path and
+with the sharded scorer at 2, 4 and 8 workers, then reports throughput,
+speedup over the single call and parallel efficiency (speedup / workers).
+
+Run from the repository root:
+    python -m backend.benchmarks.sharded_inference --rows 2000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model, prepare_features
+from backend.sharding import ShardedScorer
+
+MODEL_PATH = "ml-pipeline/model/catboost_model.cbm"
+FEATURES_PATH = "ml-pipeline/results/candidate_planet_predictions.csv"
+
+
+def make_batch(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Resample real KOI feature rows up to the requested batch size."""
+    source = pd.read_csv(FEATURES_PATH)
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(source), size=n_rows)
+    return source.iloc[rows].reset_index(drop=True)
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args()
+
+    model, feature_columns, cat_features = load_catboost_model(args.model)
+    prepared = prepare_features(make_batch(args.rows), feature_columns, cat_features)
+    print(f"Batch: {len(prepared):,} rows x {prepared.shape[1]} features")
+
+    print(f"CPUs available: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+    single = best_of(lambda: model.predict_proba(prepared), args.repeats)
+
+    print(f"{'workers':>7}  {'seconds':>8}  {'rows/s':>12}  {'speedup':>7}  {'efficiency':>10}")
+    print(f"{'in-proc':>7}  {single:8.3f}  {len(prepared) / single:12,.0f}  {1.0:7.2f}  {'':>10}")
+    for workers in args.workers:
+        scorer = ShardedScorer(args.model, workers=workers)
+        try:
+            scorer.warmup()
+            elapsed = best_of(lambda: scorer.predict_proba(prepared), args.repeats)
+        finally:
+            scorer.shutdown()
+
+        speedup = single / elapsed
+        print(f"{workers:>7}  {elapsed:8.3f}  {len(prepared) / elapsed:12,.0f}  "
+              f"{speedup:7.2f}  {speedup / workers:10.1%}")
+
+
+if __name__ == "__main__":
+    main()
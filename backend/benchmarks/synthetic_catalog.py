@@ -0,0 +1,168 @@
+"""
+Synthetic KOI catalogs for scale testing.
+
+Fits a Gaussian copula to the koi_* model features of the NASA KOI table
+(per-column empirical quantiles plus the rank correlation between columns)
+and streams any number of synthetic rows to disk in chunks, so memory use
+does not grow with the output size. Writes, in the output directory:
+
+- upload.csv                         feature columns, for /predict_csv and /jobs
+- results.csv                        id, name, predicted_disposition, probability_confirmed
+- candidate_planet_predictions.csv   row-aligned features + scores, like ml-pipeline/results
+
+Set STELLAR_DATA_PATH / STELLAR_FEATURES_PATH to the last two (and
+STELLAR_SHAP_PATH / STELLAR_SNAPSHOT_PATH to scratch files) to benchmark
+every endpoint against them.
+
+Run from the repository root:
+    python -m backend.benchmarks.synthetic_catalog --rows 1000000 --out-dir /tmp/koi_1m
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.score_store import disposition_labels
+from backend.scoring import load_catboost_model, prepare_features
+
+NASA_PATH = "ml-pipeline/dataset/NASA_data_set.xlsx"
+MODEL_PATH = "ml-pipeline/model/catboost_model.cbm"
+RESULTS_PATH = "backend/data/results.csv"
+
+# The koi_* columns the model is trained on
+FEATURE_COLUMNS = [
+    "koi_period", "koi_time0bk", "koi_impact", "koi_duration", "koi_depth", "koi_prad",
+    "koi_model_snr", "koi_steff", "koi_slogg", "koi_srad", "koi_kepmag",
+]
+N_QUANTILES = 2001
+ID_BASE = 100_000_000  # above real Kepler ids, still fits int32
+
+
+class CopulaModel:
+    """Gaussian copula over empirical marginals."""
+
+    def __init__(self, quantiles: np.ndarray, null_fraction: np.ndarray, cholesky: np.ndarray,
+                 system_sizes: np.ndarray, system_weights: np.ndarray):
+        self.probs = np.linspace(0.0, 1.0, quantiles.shape[0])
+        self.quantiles = quantiles            # (N_QUANTILES, n_features)
+        self.null_fraction = null_fraction    # (n_features,)
+        self.cholesky = cholesky              # (n_features, n_features)
+        self.system_sizes = system_sizes      # planets per star seen in the real table
+        self.system_weights = system_weights
+
+    @classmethod
+    def fit(cls, table: pd.DataFrame) -> "CopulaModel":
+        from scipy.special import ndtri
+
+        features = table[FEATURE_COLUMNS].astype(float)
+        probs = np.linspace(0.0, 1.0, N_QUANTILES)
+        quantiles = np.column_stack([np.nanquantile(features[c], probs) for c in FEATURE_COLUMNS])
+        null_fraction = features.isna().mean().to_numpy()
+
+        # Normal scores of the ranks; missing values sit at the median (score 0)
+        ranks = features.rank(pct=True, method="average").to_numpy()
+        n = features.notna().sum().to_numpy()
+        scores = ndtri(np.clip(ranks * n / (n + 1), 1e-9, 1 - 1e-9))
+        scores = np.nan_to_num(scores, nan=0.0)
+        correlation = np.corrcoef(scores, rowvar=False)
+        cholesky = np.linalg.cholesky(correlation + 1e-9 * np.eye(len(FEATURE_COLUMNS)))
+
+        sizes = table["kepid"].value_counts().value_counts().sort_index()
+        return cls(quantiles, null_fraction, cholesky,
+                   sizes.index.to_numpy(), (sizes / sizes.sum()).to_numpy())
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        from scipy.special import ndtr
+
+        z = rng.standard_normal((n_rows, len(FEATURE_COLUMNS))) @ self.cholesky.T
+        u = ndtr(z)
+        values = np.empty_like(u)
+        for j in range(len(FEATURE_COLUMNS)):
+            values[:, j] = np.interp(u[:, j], self.probs, self.quantiles[:, j])
+            values[rng.random(n_rows) < self.null_fraction[j], j] = np.nan
+        return pd.DataFrame(values, columns=FEATURE_COLUMNS)
+
+
+def make_identifiers(n_rows: int, start_system: int, model: CopulaModel, rng: np.random.Generator):
+    """Kepler-like ids (shared by planets of one system) and unique KOI-style names."""
+    sizes = rng.choice(model.system_sizes, p=model.system_weights, size=n_rows)
+    system = np.repeat(np.arange(len(sizes)), sizes)[:n_rows]
+    planet = np.arange(n_rows) - np.searchsorted(system, system)  # position within its system
+    system += start_system
+    ids = ID_BASE + system
+    names = pd.Series(system).map("S{:08d}".format) + "." + pd.Series(planet + 1).map("{:02d}".format)
+    return ids, names.to_numpy(), int(system[-1]) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a synthetic KOI catalog for scale testing")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--source", default=NASA_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--no-score", action="store_true",
+                        help="Draw probabilities from the real results.csv distribution instead of scoring rows")
+    args = parser.parse_args()
+
+    table = pd.read_excel(args.source)
+    table.columns = table.columns.str.strip()
+    copula = CopulaModel.fit(table)
+    print(f"Fitted copula on {len(table):,} KOIs x {len(FEATURE_COLUMNS)} features")
+
+    model, real_probabilities = None, None
+    if args.no_score:
+        real_probabilities = pd.read_csv(RESULTS_PATH, usecols=["probability_confirmed"])["probability_confirmed"].to_numpy()
+    else:
+        model, feature_columns, cat_features = load_catboost_model(args.model)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    paths = {name: os.path.join(args.out_dir, name)
+             for name in ("upload.csv", "results.csv", "candidate_planet_predictions.csv")}
+    files = {name: open(path, "w", newline="") for name, path in paths.items()}
+
+    rng = np.random.default_rng(args.seed)
+    written, next_system = 0, 0
+    started = time.perf_counter()
+    try:
+        while written < args.rows:
+            n = min(args.chunk_rows, args.rows - written)
+            features = copula.sample(n, rng)
+            ids, names, next_system = make_identifiers(n, next_system, copula, rng)
+
+            if model is not None:
+                probability = model.predict_proba(prepare_features(features, feature_columns, cat_features))[:, 1]
+            else:
+                probability = np.quantile(real_probabilities, rng.random(n))
+            disposition = disposition_labels(probability)
+
+            header = written == 0
+            features.to_csv(files["upload.csv"], header=header, index=False)
+            pd.DataFrame({
+                "id": ids,
+                "name": names,
+                "predicted_disposition": disposition,
+                "probability_confirmed": probability,
+            }).to_csv(files["results.csv"], header=header, index=False)
+            scored = features.copy()
+            scored.insert(0, "koi_disposition", "CANDIDATE")
+            scored["predicted_disposition"] = disposition
+            scored["probability_confirmed"] = probability
+            scored.to_csv(files["candidate_planet_predictions.csv"], header=header, index=False)
+
+            written += n
+            elapsed = time.perf_counter() - started
+            print(f"{written:,} / {args.rows:,} rows ({written / elapsed:,.0f} rows/s)")
+    finally:
+        for f in files.values():
+            f.close()
+
+    for path in paths.values():
+        print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.explain import FEATURES_PATH, load_catalog_shap
+from backend.scoring import confidence_level
+from backend.similarity import SimilarityIndex
+
+# Compact in-memory dtypes for results.csv; ids and names are handled separately
+CATALOG_DTYPES = {
+    'predicted_disposition': 'category',
+    'probability_confirmed': 'float32',
+}
+
+
+def _compact_ids(ids: pd.Series) -> pd.Series:
+    """Downcast integer ids to int32 when every value fits."""
+    info = np.iinfo(np.int32)
+    if pd.api.types.is_integer_dtype(ids) and len(ids) and info.min <= ids.min() and ids.max() <= info.max:
+        return ids.astype(np.int32)
+    return ids
+
+
+def _compact_strings(names: pd.Series) -> pd.Series:
+    """Store names in one Arrow buffer instead of one Python object per row, when pyarrow is installed."""
+    try:
+        return names.astype("string[pyarrow]")
+    except ImportError:
+        return names
+
+
+def load_catalog_frame(data_path: str) -> pd.DataFrame:
+    """Read results.csv with compact column dtypes."""
+    df = pd.read_csv(data_path, dtype=CATALOG_DTYPES)
+    if 'id' in df.columns:
+        df['id'] = _compact_ids(df['id'])
+    if 'name' in df.columns:
+        df['name'] = _compact_strings(df['name'])
+    return df
+
+
+def _first_positions(keys: pd.Series):
+    """Unique index over keys plus the row position of each key's first occurrence."""
+    first = ~keys.duplicated().to_numpy()
+    return pd.Index(keys.to_numpy()[first]), np.flatnonzero(first)
+
+
+class CatalogIndex:
+    """
+    Exact-match lookup from catalog ids and case-insensitive names to row
+    positions. Duplicate keys resolve to their first row, like a scan would.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.id_index, self.id_positions = _first_positions(df['id'])
+        self.name_index, self.name_positions = _first_positions(df['name'].astype(str).str.upper())
+
+    @staticmethod
+    def _lookup(index: pd.Index, positions: np.ndarray, keys) -> np.ndarray:
+        found = index.get_indexer(keys)
+        return np.where(found >= 0, positions[found], -1)
+
+    def lookup_ids(self, ids) -> np.ndarray:
+        """Row positions for a list of ids (-1 when not found)."""
+        return self._lookup(self.id_index, self.id_positions, ids)
+
+    def lookup_names(self, names) -> np.ndarray:
+        """Row positions for a list of names, case-insensitive (-1 when not found)."""
+        return self._lookup(self.name_index, self.name_positions, pd.Index(names).str.upper())
+
+    def resolve(self, queries) -> np.ndarray:
+        """
+        Row positions for a mixed list of ids and names, matched like /detect
+        (numeric queries as ids first, then as names) without partial matching.
+        """
+        keys = pd.Series(queries, dtype=object).astype(str).str.strip()
+        positions = np.full(len(keys), -1, dtype=np.intp)
+        # ASCII 0-9 only: isdigit() also accepts "²" and friends, which int64 cannot parse.
+        # Longer digit strings cannot be int64 ids
+        numeric = (keys.str.isascii() & keys.str.isdecimal() & (keys.str.len() <= 18)).to_numpy()
+        if numeric.any():
+            positions[numeric] = self.lookup_ids(keys[numeric].astype(np.int64).to_numpy())
+        missing = positions < 0
+        if missing.any():
+            positions[missing] = self.lookup_names(keys[missing].to_numpy())
+        return positions
+
+
+def compute_stats(df: pd.DataFrame) -> dict:
+    """Dataset statistics served by /stats."""
+    probability = df['probability_confirmed']
+    # Accumulate in float64 even though probabilities are stored as float32
+    average_probability = float(np.mean(probability.to_numpy(), dtype=np.float64))
+    disposition = df['predicted_disposition'].astype(str).str.upper()
+
+    return {
+        "total_objects": len(df),
+        # Count based on probability threshold (>0.5 = confirmed candidate)
+        "confirmed_candidates": int((probability > 0.5).sum()),
+        "false_positives": int((probability <= 0.5).sum()),
+        "average_probability": round(average_probability, 4),
+        "high_confidence": int((probability >= 0.8).sum()),
+        "medium_confidence": int(((probability >= 0.5) & (probability < 0.8)).sum()),
+        "low_confidence": int((probability < 0.5).sum()),
+        # Also count by disposition string (for reference)
+        "disposition_stats": {
+            "candidates": int((disposition == 'CANDIDATE').sum()),
+            "false_positives": int((disposition == 'FALSE POSITIVE').sum())
+        }
+    }
+
+
+@dataclass(frozen=True)
+class CatalogState:
+    """
+    The catalog and every structure derived from it. Built completely before
+    being published, then replaced as a whole, never modified in place.
+    """
+    df: pd.DataFrame
+    index: CatalogIndex
+    stats: dict
+    fingerprint: tuple
+    loaded_at: float
+    shap: Optional[np.ndarray] = None
+    features: Optional[np.ndarray] = None
+    similarity: Optional[SimilarityIndex] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+
+def find_planet(state: CatalogState, search_query: str, partial: bool = True) -> Optional[int]:
+    """Row position of the first catalog object matching an ID or name."""
+    # Try to find by ID first (if numeric)
+    position = -1
+    if search_query.isascii() and search_query.isdecimal() and len(search_query) <= 18:
+        position = state.index.lookup_ids([int(search_query)])[0]
+
+    # If not found by ID, search by name (case-insensitive)
+    if position < 0:
+        position = state.index.lookup_names([search_query])[0]
+
+    # If still not found, try partial match
+    if position < 0 and partial:
+        matches = np.flatnonzero(state.df['name'].str.contains(search_query, case=False, na=False).to_numpy())
+        position = matches[0] if len(matches) else -1
+
+    return int(position) if position >= 0 else None
+
+
+def planet_result(state: CatalogState, position: int) -> dict:
+    """The /detect response for one catalog row."""
+    planet = state.df.iloc[position]
+    prob = float(planet['probability_confirmed'])
+    return {
+        "id": int(planet['id']),
+        "name": str(planet['name']),
+        "predicted_disposition": str(planet['predicted_disposition']),
+        "probability_confirmed": prob,
+        # Confirmed when the probability is above 0.5
+        "is_confirmed": prob > 0.5,
+        "confidence_level": confidence_level(prob),
+    }
+
+
+def planet_records(state: CatalogState, positions: np.ndarray) -> pd.DataFrame:
+    """planet_result for many rows at once, as a frame with one row per position."""
+    rows = state.df.iloc[positions]
+    prob = rows['probability_confirmed'].to_numpy(dtype=np.float64)
+    return pd.DataFrame({
+        "id": rows['id'].to_numpy(dtype=np.int64),
+        "name": rows['name'].astype(str).to_numpy(),
+        "predicted_disposition": rows['predicted_disposition'].astype(str).to_numpy(),
+        "probability_confirmed": prob,
+        "is_confirmed": prob > 0.5,
+        "confidence_level": np.select([prob >= 0.8, prob >= 0.5], ["High", "Medium"], default="Low"),
+    })
+
+
+def build_catalog(data_path: str, fingerprint: tuple, model=None, feature_columns=None,
+                  cat_features=None, model_path: Optional[str] = None) -> CatalogState:
+    """
+    Load results.csv and build its index and statistics. With a model, also load
+    the row-aligned features, their similarity index and explanations.
+    """
+    df = load_catalog_frame(data_path)
+
+    shap, features, similarity = None, None, None
+    if model is not None and not df.empty:
+        try:
+            features = pd.read_csv(FEATURES_PATH).reindex(columns=feature_columns).to_numpy()
+            if len(features) != len(df):
+                raise ValueError(f"{FEATURES_PATH} has {len(features)} rows but the catalog has {len(df)}")
+        except Exception as e:
+            print(f"❌ Error loading catalog features: {e}")
+            features = None
+
+    if features is not None:
+        try:
+            similarity = SimilarityIndex(features)
+        except Exception as e:
+            print(f"❌ Error building similarity index: {e}")
+        try:
+            shap = np.asarray(load_catalog_shap(model, feature_columns, cat_features, len(df), model_path))
+        except Exception as e:
+            print(f"❌ Error loading explanations: {e}")
+
+    return CatalogState(
+        df=df,
+        index=CatalogIndex(df),
+        stats=compute_stats(df) if not df.empty else {},
+        fingerprint=fingerprint,
+        loaded_at=time.time(),
+        shap=shap,
+        features=features,
+        similarity=similarity,
+    )
+
+
+def _nbytes(obj) -> int:
+    if obj is None:
+        return 0
+    if isinstance(obj, (pd.Index, pd.Series)):
+        return int(obj.memory_usage(deep=True))
+    return int(obj.nbytes)
+
+
+def memory_report(state: CatalogState) -> dict:
+    """Bytes used by each catalog column and each derived structure."""
+    df = state.df
+    columns = {
+        col: {"dtype": str(df[col].dtype), "bytes": int(df[col].memory_usage(index=False, deep=True))}
+        for col in df.columns
+    }
+    indexes = {
+        "row_index": _nbytes(df.index),
+        "id_index": _nbytes(state.index.id_index) + _nbytes(state.index.id_positions),
+        "name_index": _nbytes(state.index.name_index) + _nbytes(state.index.name_positions),
+    }
+    arrays = {
+        "shap_values": _nbytes(state.shap),
+        "features": _nbytes(state.features),
+        "similarity_index": state.similarity.nbytes if state.similarity is not None else 0,
+    }
+    total = sum(c["bytes"] for c in columns.values()) + sum(indexes.values()) + sum(arrays.values())
+
+    return {
+        "records": len(df),
+        "columns": columns,
+        "indexes": indexes,
+        "arrays": arrays,
+        "total_bytes": total,
+    }
@@ -0,0 +1,352 @@
+"""
+Constant-memory feature drift monitoring.
+
+A reference built offline from the notebook's training rows stores, for each
+koi_* feature, quantile bin edges and the fraction of training rows in each
+bin. At runtime small batches (a single /predict row, say) are queued as a
+copy of their raw rows, which is cheaper than binning on the request path;
+large batches are subsampled and folded into one fixed-size histogram per
+feature on those edges before queueing, so no queued batch costs more than a
+few tens of KB. A background thread bins the raw rows and merges everything
+into the running histograms. Histograms are plain counts, so they merge by addition
+and memory does not grow with traffic. Live quantiles are read back from the
+cumulative histogram, and PSI / KS divergence is computed against the
+reference.
+
+The reference ships as backend/data/drift_reference.json. Rebuild it after
+retraining with either of:
+    python -m backend.drift
+    python -m backend.snapshot
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DRIFT_REFERENCE_PATH = os.environ.get("STELLAR_DRIFT_REFERENCE_PATH", "backend/data/drift_reference.json")
+# Large batches are uniformly subsampled before queueing
+DRIFT_SAMPLE_ROWS = int(os.environ.get("STELLAR_DRIFT_SAMPLE_ROWS", "50000"))
+DRIFT_QUEUE_SIZE = int(os.environ.get("STELLAR_DRIFT_QUEUE_SIZE", "256"))
+# Batches up to this many rows are queued as raw rows (256 x 11 float64 = 22 KB)
+DRIFT_RAW_ROWS = int(os.environ.get("STELLAR_DRIFT_RAW_ROWS", "256"))
+
+N_BINS = 20
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+PSI_EPSILON = 1e-4
+# Usual PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Counts of non-missing values per bin; bins are (-inf, e0), [e0, e1), ..., [e_last, inf)."""
+    values = values[~np.isnan(values)]
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+
+def build_reference(frame: pd.DataFrame, n_bins: int = N_BINS) -> Dict:
+    """Quantile bin edges and bin fractions of every numeric column."""
+    features = {}
+    for name in frame.select_dtypes(include="number").columns:
+        values = frame[name].to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        if len(present) == 0:
+            continue
+        edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = bin_counts(values, edges)
+        features[name] = {
+            "edges": edges.tolist(),
+            "fractions": (counts / counts.sum()).tolist(),
+            "quantiles": dict(zip(map(str, QUANTILES), np.quantile(present, QUANTILES).tolist())),
+            "null_fraction": float(1 - len(present) / len(values)),
+        }
+    return {"rows": int(len(frame)), "created_at": time.time(), "features": features}
+
+
+def training_reference(source_path: str, model_path: str, n_bins: int = N_BINS) -> Dict:
+    """Reference of the model's features over the notebook's training split."""
+    from backend.model_search import load_training_data
+    from backend.scoring import load_catboost_model
+
+    _, feature_columns, _ = load_catboost_model(model_path)
+    X_train, _, _, _ = load_training_data(source_path, feature_columns)
+    return build_reference(X_train, n_bins)
+
+
+def save_reference(reference: Dict, path: str = DRIFT_REFERENCE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(reference, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_reference(path: str = DRIFT_REFERENCE_PATH) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Population stability index between two bin-fraction vectors."""
+    expected = np.clip(expected, PSI_EPSILON, None)
+    actual = np.clip(actual, PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class FeatureHistogram:
+    """Fixed-size, mergeable histogram of one feature on fixed bin edges."""
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.nulls = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        present = values[~np.isnan(values)]
+        self.nulls += len(values) - len(present)
+        if len(present):
+            self.counts += bin_counts(present, self.edges)
+            self.min = min(self.min, float(present.min()))
+            self.max = max(self.max, float(present.max()))
+
+    def merge(self, other: "FeatureHistogram"):
+        self.counts += other.counts
+        self.nulls += other.nulls
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Interpolated within the bin holding the q-th value; tail bins end at the observed min/max."""
+        total = self.count
+        if total == 0:
+            return None
+        bounds = np.concatenate([[self.min], self.edges, [self.max]])
+        cumulative = np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, q * total, side='left'))
+        lo, hi = bounds[i], max(bounds[i], bounds[i + 1])
+        before = cumulative[i - 1] if i else 0
+        within = (q * total - before) / self.counts[i] if self.counts[i] else 0.0
+        return float(lo + (hi - lo) * within)
+
+
+class DriftMonitor:
+    """
+    Per-feature histograms of served inputs, merged by a background thread.
+    observe() never blocks: when the queue is full the batch is dropped and counted.
+    """
+
+    def __init__(self, reference: Dict, sample_rows: int = DRIFT_SAMPLE_ROWS, queue_size: int = DRIFT_QUEUE_SIZE,
+                 raw_rows: int = DRIFT_RAW_ROWS):
+        self.reference = reference
+        self.features = list(reference["features"].keys())
+        self.edges = {name: np.asarray(ref["edges"], dtype=np.float64)
+                      for name, ref in reference["features"].items()}
+        self.sample_rows = sample_rows
+        self.raw_rows = raw_rows
+        self._layouts = {}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+        self._thread = None
+        self._stop = threading.Event()
+        self.dropped_batches = 0
+        self.observe_seconds = 0.0
+        self.update_seconds = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.histograms = {name: FeatureHistogram(edges) for name, edges in self.edges.items()}
+        self.batches = 0
+        self.rows = 0
+        self.since = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _sample(self, n_rows: int) -> Optional[np.ndarray]:
+        if n_rows <= self.sample_rows:
+            return None
+        return np.sort(self._rng.choice(n_rows, self.sample_rows, replace=False))
+
+    def observe(self, columns: Dict[str, np.ndarray]):
+        """Queue one batch, given as feature name -> 1D array."""
+        names = [name for name in self.features if name in columns]
+        n_rows = len(columns[names[0]]) if names else 0
+        if n_rows == 0:
+            return
+        rows = self._sample(n_rows)
+        matrix = np.column_stack([
+            np.asarray(columns[name], dtype=np.float64)[rows] if rows is not None
+            else np.asarray(columns[name], dtype=np.float64)
+            for name in names
+        ])
+        self._enqueue(names, matrix)
+
+    def observe_frame(self, df: pd.DataFrame):
+        """
+        Queue one batch of a prepared frame. The frame is read with one to_numpy()
+        call and sliced by position; selecting df[names] first costs more than
+        binning the row.
+        """
+        names, positions = self._layout(tuple(df.columns))
+        if not names or len(df) == 0:
+            return
+        values = df.to_numpy()
+        rows = self._sample(len(values))
+        if rows is not None:
+            values = values[rows]
+        self._enqueue(names, values[:, positions].astype(np.float64))
+
+    def _layout(self, columns: Tuple[str, ...]) -> Tuple[List[str], np.ndarray]:
+        """Feature names present in a frame and their column positions, cached per column layout."""
+        layout = self._layouts.get(columns)
+        if layout is None:
+            index = {name: i for i, name in enumerate(columns)}
+            names = [name for name in self.features if name in index]
+            layout = (names, np.array([index[name] for name in names], dtype=np.intp))
+            if len(self._layouts) < 16:
+                self._layouts[columns] = layout
+        return layout
+
+    def _enqueue(self, names: List[str], matrix: np.ndarray):
+        """
+        Small batches are queued as raw rows and binned by the background thread;
+        large ones are folded into bin counts first. Never blocks.
+        """
+        started = time.perf_counter()
+        if len(matrix) <= self.raw_rows:
+            # A fresh copy, so the caller's buffers may be reused once the request ends
+            payload = matrix if matrix.flags.owndata else matrix.copy()
+        else:
+            payload = self._histograms(names, matrix)
+        try:
+            self._queue.put_nowait((len(matrix), tuple(names), payload))
+            dropped = 0
+        except queue.Full:
+            dropped = 1
+        with self._lock:
+            self.dropped_batches += dropped
+            self.observe_seconds += time.perf_counter() - started
+
+    def _histograms(self, names, matrix: np.ndarray) -> Dict[str, FeatureHistogram]:
+        histograms = {}
+        for i, name in enumerate(names):
+            histogram = FeatureHistogram(self.edges[name])
+            histogram.update(matrix[:, i])
+            histograms[name] = histogram
+        return histograms
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batches = [self._queue.get(timeout=1.0)]
+            except queue.Empty:
+                continue
+            # Fold everything that is already waiting in one pass
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._update(batches)
+
+    def _update(self, batches: List[Tuple[int, Tuple[str, ...], object]]):
+        started = time.perf_counter()
+        # Raw rows with the same columns are binned together, outside the lock
+        raw = {}
+        folded = []
+        for _, names, payload in batches:
+            if isinstance(payload, dict):
+                folded.append(payload)
+            else:
+                raw.setdefault(names, []).append(payload)
+        folded.extend(self._histograms(names, np.vstack(parts)) for names, parts in raw.items())
+
+        with self._lock:
+            for histograms in folded:
+                for name, histogram in histograms.items():
+                    self.histograms[name].merge(histogram)
+            self.rows += sum(rows for rows, _, _ in batches)
+            self.batches += len(batches)
+            self.update_seconds += time.perf_counter() - started
+
+    def report(self) -> Dict:
+        """PSI, KS distance and live vs reference quantiles for every feature."""
+        with self._lock:
+            features = {}
+            for name, histogram in self.histograms.items():
+                ref = self.reference["features"][name]
+                total = histogram.count
+                observed = total + histogram.nulls
+                if total == 0:
+                    features[name] = {"count": 0, "psi": None, "ks": None, "status": "no data"}
+                    continue
+                expected = np.asarray(ref["fractions"])
+                actual = histogram.counts / total
+                score = psi(expected, actual)
+                features[name] = {
+                    "count": total,
+                    "psi": score,
+                    "ks": float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected)))),
+                    "status": ("significant" if score > PSI_SIGNIFICANT
+                               else "moderate" if score > PSI_MODERATE else "stable"),
+                    "null_fraction": histogram.nulls / observed,
+                    "reference_null_fraction": ref["null_fraction"],
+                    "quantiles": {str(q): histogram.quantile(q) for q in QUANTILES},
+                    "reference_quantiles": ref["quantiles"],
+                }
+            scores = [f["psi"] for f in features.values() if f["psi"] is not None]
+            return {
+                "since": self.since,
+                "batches": self.batches,
+                "rows": self.rows,
+                "queued_batches": self._queue.qsize(),
+                "dropped_batches": self.dropped_batches,
+                "observe_seconds": round(self.observe_seconds, 6),
+                "update_seconds": round(self.update_seconds, 6),
+                "reference_rows": self.reference["rows"],
+                "max_psi": max(scores) if scores else None,
+                "drifted_features": [n for n, f in features.items() if f["status"] == "significant"],
+                "features": features,
+            }
+
+
+def main():
+    from backend.model_search import NASA_PATH, MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Build the drift reference from the training rows")
+    parser.add_argument("--source", default=NASA_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=DRIFT_REFERENCE_PATH)
+    parser.add_argument("--bins", type=int, default=N_BINS)
+    args = parser.parse_args()
+
+    reference = training_reference(args.source, args.model, args.bins)
+    save_reference(reference, args.out)
+    print(f"✅ Saved drift reference for {len(reference['features'])} features "
+          f"({reference['rows']:,} training rows) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+SHAP explanations for catalog objects and ad-hoc inputs.
+
+Catalog explanations are computed in one batch and stored as a float32 array
+with one row per catalog row (last column is the expected value), so serving
+an explanation is a row lookup. Ad-hoc inputs are explained on demand, in
+batches, behind a bounded LRU cache.
+
+Precompute the catalog store offline with:
+    python -m backend.explain
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model, prepare_features
+
+# Feature rows aligned one-to-one with backend/data/results.csv
+FEATURES_PATH = os.environ.get("STELLAR_FEATURES_PATH", "ml-pipeline/results/candidate_planet_predictions.csv")
+SHAP_PATH = os.environ.get("STELLAR_SHAP_PATH", "backend/data/shap_values.npy")
+SHAP_CACHE_SIZE = int(os.environ.get("STELLAR_SHAP_CACHE_SIZE", "4096"))
+
+
+def compute_shap_values(model, df_prepared: pd.DataFrame, cat_features=None) -> np.ndarray:
+    """SHAP values in log-odds space, shape (n_rows, n_features + 1)."""
+    from catboost import Pool
+
+    pool = Pool(df_prepared, cat_features=cat_features or None)
+    return model.get_feature_importance(pool, type='ShapValues').astype(np.float32)
+
+
+def _is_stale(path: str, *sources: str) -> bool:
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(os.path.exists(src) and os.path.getmtime(src) > built for src in sources)
+
+
+def load_catalog_shap(model, feature_columns, cat_features, n_rows: int, model_path: str,
+                      features_path: str = FEATURES_PATH, shap_path: str = SHAP_PATH) -> np.ndarray:
+    """
+    Return SHAP values for every catalog row, reusing the stored array when it is
+    newer than the model and feature files and matches the catalog shape.
+    """
+    expected_shape = (n_rows, len(feature_columns) + 1)
+    if not _is_stale(shap_path, model_path, features_path):
+        values = np.load(shap_path, mmap_mode='r')
+        if values.shape == expected_shape:
+            return values
+
+    features = pd.read_csv(features_path)
+    if len(features) != n_rows:
+        raise ValueError(
+            f"{features_path} has {len(features)} rows but the catalog has {n_rows}"
+        )
+
+    values = compute_shap_values(model, prepare_features(features, feature_columns, cat_features), cat_features)
+    try:
+        # Write beside and rename: a previous catalog may still have the old file memory-mapped
+        tmp_path = shap_path + ".tmp.npy"
+        np.save(tmp_path, values)
+        os.replace(tmp_path, shap_path)
+    except OSError as e:
+        print(f"⚠️ Could not save SHAP values to {shap_path}: {e}")
+    return values
+
+
+def explanation(feature_columns, shap_row: np.ndarray, feature_values) -> dict:
+    """Turn one SHAP row into contributions sorted by absolute impact."""
+    contributions = shap_row[:-1].astype(float)
+    expected_value = float(shap_row[-1])
+    raw_score = expected_value + float(contributions.sum())
+
+    order = np.argsort(-np.abs(contributions))
+    return {
+        "expected_value": expected_value,
+        "probability_candidate": float(1.0 / (1.0 + np.exp(-raw_score))),
+        "contributions": [
+            {
+                "feature": feature_columns[i],
+                "value": None if pd.isna(feature_values[i]) else float(feature_values[i]),
+                "shap_value": float(contributions[i]),
+            }
+            for i in order
+        ],
+    }
+
+
+class ShapCache:
+    """Bounded LRU cache of SHAP rows for ad-hoc inputs, keyed by feature values."""
+
+    def __init__(self, max_size: int = SHAP_CACHE_SIZE):
+        self.max_size = max_size
+        self._rows = OrderedDict()
+        # Called from the request threadpool; SHAP itself is computed outside the lock
+        self._lock = threading.Lock()
+
+    def explain(self, model, df_prepared: pd.DataFrame, cat_features=None) -> np.ndarray:
+        """SHAP rows for a prepared batch, computing all cache misses in one call."""
+        keys = [tuple(row) for row in df_prepared.itertuples(index=False, name=None)]
+        with self._lock:
+            found = {k: self._rows[k] for k in keys if k in self._rows}
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+
+        if missing:
+            missing_frame = pd.DataFrame(missing, columns=df_prepared.columns)
+            computed = compute_shap_values(model, missing_frame, cat_features)
+            found.update(zip(missing, computed))
+
+        with self._lock:
+            for k in keys:
+                self._rows[k] = found[k]
+                self._rows.move_to_end(k)
+            while len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+        return np.stack([found[k] for k in keys])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+
+if __name__ == "__main__":
+    model_path = "ml-pipeline/model/catboost_model.cbm"
+    model, feature_columns, cat_features = load_catboost_model(model_path)
+    n_rows = len(pd.read_csv("backend/data/results.csv", usecols=["id"]))
+    if os.path.exists(SHAP_PATH):
+        os.remove(SHAP_PATH)
+    values = load_catalog_shap(model, feature_columns, cat_features, n_rows, model_path)
+    print(f"✅ Saved SHAP values {values.shape} to {SHAP_PATH}")
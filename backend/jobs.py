@@ -0,0 +1,238 @@
+"""
+Background scoring jobs for large CSV uploads.
+
+Job state lives in a small SQLite database next to the job files so that the
+API process and the scoring worker processes can all read and update it.
+Each job gets its own directory holding the uploaded input and scored output.
+Finished jobs are deleted, files included, once their retention period is over.
+"""
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional, Dict
+
+import pandas as pd
+
+from backend.scoring import load_catboost_model, prepare_features, add_prediction_columns
+
+JOBS_DIR = os.environ.get("STELLAR_JOBS_DIR", "backend/data/jobs")
+JOBS_DB_PATH = os.path.join(JOBS_DIR, "jobs.sqlite3")
+JOB_WORKERS = int(os.environ.get("STELLAR_JOB_WORKERS", "2"))
+JOB_CHUNK_ROWS = int(os.environ.get("STELLAR_JOB_CHUNK_ROWS", "50000"))
+# Completed and failed jobs are removed after this many hours (0 keeps them)
+JOB_RETENTION_HOURS = float(os.environ.get("STELLAR_JOB_RETENTION_HOURS", "24"))
+JOB_CLEANUP_INTERVAL = 3600  # seconds
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    total_rows INTEGER,
+    processed_rows INTEGER NOT NULL DEFAULT 0,
+    input_bytes INTEGER,
+    processed_bytes INTEGER NOT NULL DEFAULT 0,
+    confirmed_count INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = {
+    "input_bytes": "ALTER TABLE jobs ADD COLUMN input_bytes INTEGER",
+    "processed_bytes": "ALTER TABLE jobs ADD COLUMN processed_bytes INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class JobStore:
+    """SQLite-backed job table shared between the API and worker processes."""
+
+    def __init__(self, db_path: str = JOBS_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, filename: Optional[str]) -> Dict:
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(os.path.dirname(self.db_path), job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        job = {
+            "id": job_id,
+            "status": QUEUED,
+            "filename": filename,
+            "input_path": os.path.join(job_dir, "input.csv"),
+            "output_path": os.path.join(job_dir, "scored.csv"),
+            "created_at": time.time(),
+        }
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, filename, input_path, output_path, created_at) "
+                "VALUES (:id, :status, :filename, :input_path, :output_path, :created_at)",
+                job,
+            )
+        return job
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        assignments = ", ".join(f"{name} = :{name}" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = :id", {**fields, "id": job_id})
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def fail_unfinished(self, reason: str) -> int:
+        """Mark jobs that were queued or running in a previous server process as failed."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?)",
+                (FAILED, reason, time.time(), QUEUED, RUNNING),
+            )
+            return cursor.rowcount
+
+    def purge_finished(self, max_age_seconds: float) -> int:
+        """Delete completed and failed jobs older than max_age_seconds, with their directories."""
+        cutoff = time.time() - max_age_seconds
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, input_path FROM jobs WHERE status IN (?, ?) AND COALESCE(finished_at, created_at) < ?",
+                (COMPLETED, FAILED, cutoff),
+            ).fetchall()
+        # Files first: a row without files is harmless, files without a row would never be removed
+        for row in rows:
+            shutil.rmtree(os.path.dirname(row["input_path"]), ignore_errors=True)
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in rows])
+        return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+_worker_model = None
+_worker_feature_columns = None
+_worker_cat_features = []
+
+
+def _init_worker(model_path: str):
+    """Load the model once per worker process."""
+    global _worker_model, _worker_feature_columns, _worker_cat_features
+    _worker_model, _worker_feature_columns, _worker_cat_features = load_catboost_model(model_path)
+
+
+def run_scoring_job(job_id: str, db_path: str = JOBS_DB_PATH):
+    """Score a job's input CSV chunk by chunk, recording progress in the job store."""
+    store = JobStore(db_path)
+    job = store.get(job_id)
+    store.update(job_id, status=RUNNING, started_at=time.time())
+
+    tmp_path = job["output_path"] + ".part"
+    try:
+        # Progress is tracked in bytes: counting rows up front would need a second parse,
+        # since quoted fields may span several lines
+        store.update(job_id, input_bytes=os.path.getsize(job["input_path"]))
+
+        processed = 0
+        confirmed = 0
+        with open(job["input_path"], "rb") as source, open(tmp_path, "w", newline="") as out:
+            for i, chunk in enumerate(pd.read_csv(source, chunksize=JOB_CHUNK_ROWS)):
+                prepared = prepare_features(chunk, _worker_feature_columns, _worker_cat_features)
+                probabilities = _worker_model.predict_proba(prepared)
+                add_prediction_columns(chunk, probabilities)
+                chunk.to_csv(out, header=(i == 0), index=False)
+
+                processed += len(chunk)
+                confirmed += int(chunk['is_confirmed'].sum())
+                # The parser reads ahead, so this is approximate until the job completes
+                store.update(job_id, processed_rows=processed, confirmed_count=confirmed,
+                             processed_bytes=source.tell())
+
+        os.replace(tmp_path, job["output_path"])
+        store.update(job_id, status=COMPLETED, total_rows=processed, finished_at=time.time())
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+
+# ---------------------------------------------------------------------------
+# API process side
+# ---------------------------------------------------------------------------
+def create_job_pool(model_path: str, max_workers: int = JOB_WORKERS) -> ProcessPoolExecutor:
+    # Spawn rather than fork: the API process runs an event loop and threads
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path,),
+    )
+
+
+def submit_job(pool: ProcessPoolExecutor, store: JobStore, job_id: str):
+    future = pool.submit(run_scoring_job, job_id, store.db_path)
+
+    def _on_done(fut):
+        # Only reached when the worker itself died (e.g. out of memory)
+        error = fut.exception()
+        if error is not None:
+            store.update(job_id, status=FAILED, error=f"Worker error: {error}", finished_at=time.time())
+
+    future.add_done_callback(_on_done)
+    return future
+
+
+def job_summary(job: Dict) -> Dict:
+    """
+    Public view of a job row, with progress as a fraction of input bytes read.
+    total_rows is only known once the job has completed.
+    """
+    input_bytes = job.get("input_bytes")
+    if job["status"] == COMPLETED:
+        progress = 1.0
+    elif input_bytes:
+        progress = round(min((job.get("processed_bytes") or 0) / input_bytes, 1.0), 4)
+    else:
+        progress = 0.0
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "filename": job.get("filename"),
+        "total_rows": job.get("total_rows"),
+        "processed_rows": job.get("processed_rows") or 0,
+        "confirmed_count": job.get("confirmed_count") or 0,
+        "progress": progress,
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
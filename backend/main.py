@@ -1,14 +1,70 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+
+# Measured from the start of module import to readiness
+_startup_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import pandas as pd
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Union
 import numpy as np
 import io
-from catboost import CatBoostClassifier
+import json
+import shutil
+import threading
+import os
+from concurrent.futures.process import BrokenProcessPool
+from anyio import to_thread
+
+from backend import jobs, arrow_io
+from backend.catalog import CatalogState, build_catalog, memory_report, find_planet, planet_result, planet_records
+from backend.snapshot import source_fingerprint, load_snapshot, save_snapshot
+from backend.scoring import load_catboost_model, prepare_features, add_prediction_columns, prediction_result, check_sweep, sweep_result
+from backend.sharding import ShardedScorer, SHARD_WORKERS, SHARD_MIN_ROWS, MIN_SHARD_WORKERS
+from backend.explain import ShapCache, FEATURES_PATH, explanation
+from backend.admission import AdmissionController, AdmissionLimit, AdmissionMiddleware
+from backend.drift import DriftMonitor, load_reference
+from backend.shadow import ShadowScorer, SHADOW_MODEL_PATH
 
 app = FastAPI(title="Stellar Signal API", version="1.0.0")
 
+# Concurrency limits and bounded queues for expensive routes. Routes not
+# listed here (single lookups, stats, health) are never queued behind them.
+admission = AdmissionController({
+    "batch": AdmissionLimit(
+        ["/predict_csv", "/predict_arrow"],
+        max_concurrent=int(os.environ.get("STELLAR_BATCH_CONCURRENCY", "2")),
+        max_queue=int(os.environ.get("STELLAR_BATCH_QUEUE", "4")),
+        retry_after=10
+    ),
+    # Bulk lookups are index reads, not inference: they are never queued behind batch scoring
+    "bulk": AdmissionLimit(
+        ["/detect/bulk"],
+        max_concurrent=int(os.environ.get("STELLAR_BULK_CONCURRENCY", "4")),
+        max_queue=int(os.environ.get("STELLAR_BULK_QUEUE", "8")),
+        retry_after=2
+    ),
+    "jobs": AdmissionLimit(
+        ["/jobs/predict_csv"],
+        max_concurrent=int(os.environ.get("STELLAR_JOB_UPLOAD_CONCURRENCY", "2")),
+        max_queue=int(os.environ.get("STELLAR_JOB_UPLOAD_QUEUE", "8")),
+        retry_after=10
+    ),
+    "compute": AdmissionLimit(
+        ["/predict", "/predict/sweep", "/predict/explain", "/planets/similar"],
+        max_concurrent=int(os.environ.get("STELLAR_COMPUTE_CONCURRENCY", "8")),
+        max_queue=int(os.environ.get("STELLAR_COMPUTE_QUEUE", "32")),
+        retry_after=1
+    ),
+})
+# Worker threads kept free for unlimited routes beyond what limited routes can use
+RESERVED_THREADS = int(os.environ.get("STELLAR_RESERVED_THREADS", "8"))
+
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Enable CORS for Streamlit frontend
 app.add_middleware(
     CORSMiddleware,
@@ -19,76 +75,311 @@ app.add_middleware(
 )
 
 # Load the dataset and model
-DATA_PATH = "backend/data/results.csv"
-MODEL_PATH = "ml-pipeline/model/catboost_model.cbm"
-df = None
+DATA_PATH = os.environ.get("STELLAR_DATA_PATH", "backend/data/results.csv")
+MODEL_PATH = os.environ.get("STELLAR_MODEL_PATH", "ml-pipeline/model/catboost_model.cbm")
+RELOAD_INTERVAL = float(os.environ.get("STELLAR_RELOAD_INTERVAL", "5"))  # seconds, 0 disables the watcher
+catalog: Optional[CatalogState] = None  # replaced as a whole on reload, never mutated
 model = None
 feature_columns = None
 cat_features = []
+job_store = None
+job_pool = None
+job_pool_lock = threading.Lock()  # guards replacing a broken pool
+sharded_scorer = None
+shap_cache = ShapCache()
+drift_monitor = None
+shadow_scorer = None
+ready = False
+startup_seconds = None
+reload_lock = threading.Lock()  # serializes reloads only; readers never take it
+reload_status = {"reloads": 0, "last_reload": None, "last_error": None}
+watcher_stop = threading.Event()
+
+def data_fingerprint() -> tuple:
+    return source_fingerprint(DATA_PATH, FEATURES_PATH)
 
-def load_data():
-    global df
+def reload_catalog(force: bool = False) -> bool:
+    """
+    Build a new catalog state in the calling thread and publish it with a single
+    reference assignment. Returns False when skipped (unchanged or already reloading).
+    """
+    global catalog
+    if not reload_lock.acquire(blocking=False):
+        return False
     try:
-        df = pd.read_csv(DATA_PATH)
-        print(f"✅ Loaded {len(df)} records from {DATA_PATH}")
+        fingerprint = data_fingerprint()
+        if not force and catalog is not None and catalog.fingerprint == fingerprint:
+            return False
+        
+        new_catalog = build_catalog(DATA_PATH, fingerprint, model, feature_columns, cat_features, MODEL_PATH)
+        if new_catalog.empty:
+            raise ValueError(f"{DATA_PATH} has no records")
+        
+        catalog = new_catalog
+        reload_status["reloads"] += 1
+        reload_status["last_reload"] = new_catalog.loaded_at
+        reload_status["last_error"] = None
+        print(f"✅ Loaded {len(new_catalog.df)} records from {DATA_PATH}")
+        save_catalog_snapshot()
+        return True
     except Exception as e:
+        # Keep serving the previous catalog
+        reload_status["last_error"] = str(e)
         print(f"❌ Error loading data: {e}")
-        df = pd.DataFrame()
+        return False
+    finally:
+        reload_lock.release()
+
+def watch_data_files():
+    """
+    Poll the data files and reload the catalog when they change
+    """
+    while not watcher_stop.wait(RELOAD_INTERVAL):
+        if catalog is None or data_fingerprint() != catalog.fingerprint:
+            reload_catalog()
 
-def load_model():
+def load_model() -> bool:
     global model, feature_columns, cat_features
     try:
-        model = CatBoostClassifier()
-        model.load_model(MODEL_PATH)
-        
-        # Get feature names used in training
-        try:
-            feature_columns = model.feature_names_
+        # catboost is imported here rather than at module import, which only moves
+        # its import cost into startup; pandas, numpy and pyarrow still load eagerly
+        model, feature_columns, cat_features = load_catboost_model(MODEL_PATH)
+        if feature_columns:
             print(f"✅ Model loaded with {len(feature_columns)} features")
-        except AttributeError:
+        else:
             print("⚠️ Model does not have stored feature names")
-            feature_columns = []
-        
-        # Get categorical feature names
-        cat_features = model.get_param('cat_features')
-        if cat_features is None:
-            cat_features = []
         
         print(f"✅ Loaded model from {MODEL_PATH}")
+        return True
     except Exception as e:
         print(f"❌ Error loading model: {e}")
         model = None
+        return False
 
 def prepare_input(df_input: pd.DataFrame) -> pd.DataFrame:
     """
-    Prepares any DataFrame to feed the trained CatBoost model:
-    - Keeps only training features
-    - Reorders columns
-    - Fills missing features with 0
-    - Converts categorical features to strings
+    Prepares any DataFrame to feed the trained CatBoost model
+    (see backend.scoring.prepare_features)
     """
-    if feature_columns is None or len(feature_columns) == 0:
-        return df_input
-    
-    # Keep only features that the model expects
-    df_prepared = df_input.reindex(columns=feature_columns, fill_value=0)
-    
-    # Convert categorical features to string type
-    for col in cat_features:
-        if col in df_prepared.columns:
-            df_prepared[col] = df_prepared[col].astype(str)
+    return prepare_features(df_input, feature_columns, cat_features)
+
+def snapshot_fingerprint() -> tuple:
+    # Explanations depend on the model, so it is part of the snapshot key
+    return data_fingerprint() + source_fingerprint(MODEL_PATH)
+
+def restore_catalog_snapshot() -> bool:
+    """
+    Restore the catalog, its indexes and explanations from the prebuilt snapshot
+    """
+    global catalog
+    try:
+        state = load_snapshot(snapshot_fingerprint())
+    except Exception as e:
+        print(f"⚠️ Could not read catalog snapshot: {e}")
+        return False
+    if state is None or state["feature_columns"] != list(feature_columns or []):
+        return False
     
-    return df_prepared
+    catalog = state["catalog"]
+    print(f"✅ Restored {len(catalog.df)} records from catalog snapshot")
+    return True
+
+def save_catalog_snapshot():
+    state = catalog
+    if model is None or state is None or state.empty:
+        return
+    try:
+        save_snapshot(snapshot_fingerprint(), {
+            "catalog": state,
+            "feature_columns": list(feature_columns or []),
+            "cat_features": list(cat_features or []),
+        })
+        print("✅ Saved catalog snapshot")
+    except Exception as e:
+        print(f"⚠️ Could not save catalog snapshot: {e}")
+
+def warmup_model() -> bool:
+    """
+    Run one inference so the first request does not pay CatBoost's initialization
+    """
+    if model is None:
+        return False
+    try:
+        if catalog is not None and catalog.features is not None and len(catalog.features):
+            sample = pd.DataFrame(catalog.features[:1], columns=feature_columns)
+        else:
+            sample = pd.DataFrame([{}])
+        model.predict_proba(prepare_input(sample))
+        return True
+    except Exception as e:
+        print(f"⚠️ Warmup inference failed: {e}")
+        return False
+
+def start_job_workers():
+    global job_store, job_pool
+    try:
+        job_store = jobs.JobStore()
+        interrupted = job_store.fail_unfinished("Interrupted by server restart")
+        if interrupted:
+            print(f"⚠️ Marked {interrupted} unfinished jobs as failed")
+        job_pool = jobs.create_job_pool(MODEL_PATH)
+        print(f"✅ Started {jobs.JOB_WORKERS} scoring job workers")
+    except Exception as e:
+        print(f"❌ Error starting job workers: {e}")
+        job_pool = None
+        return
+    if jobs.JOB_RETENTION_HOURS > 0:
+        threading.Thread(target=clean_up_jobs, name="job-cleanup", daemon=True).start()
+
+def clean_up_jobs():
+    """
+    Delete finished jobs and their files once they are past the retention period
+    """
+    while True:
+        try:
+            removed = job_store.purge_finished(jobs.JOB_RETENTION_HOURS * 3600)
+            if removed:
+                print(f"✅ Removed {removed} expired scoring jobs")
+        except Exception as e:
+            print(f"⚠️ Job cleanup failed: {e}")
+        if watcher_stop.wait(jobs.JOB_CLEANUP_INTERVAL):
+            return
+
+def submit_scoring_job(job_id: str):
+    """
+    Hand a job to the worker pool. A worker that died (e.g. out of memory) breaks
+    the whole pool, so a broken pool is replaced and the submit retried once.
+    The job is marked failed if it still cannot be submitted.
+    """
+    global job_pool
+    try:
+        pool = job_pool
+        try:
+            jobs.submit_job(pool, job_store, job_id)
+        except BrokenProcessPool:
+            with job_pool_lock:
+                if job_pool is pool:
+                    print("⚠️ Job worker pool is broken, starting a new one")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    job_pool = jobs.create_job_pool(MODEL_PATH)
+                pool = job_pool
+            jobs.submit_job(pool, job_store, job_id)
+    except Exception as e:
+        job_store.update(job_id, status=jobs.FAILED, error=f"Could not start job: {e}", finished_at=time.time())
+        raise
+
+def start_sharded_scorer():
+    """
+    Start the shard pool and wait for every worker to load the model. Runs in a
+    background thread after startup: until it is published, batches are scored in-process.
+    """
+    global sharded_scorer
+    # Shards are shared as a numeric matrix, so categorical models keep the single-call path.
+    # With fewer than 2 workers sharding only adds overhead, so batches are scored in-process.
+    if model is None or SHARD_WORKERS < MIN_SHARD_WORKERS or cat_features:
+        return
+    try:
+        scorer = ShardedScorer(MODEL_PATH, workers=SHARD_WORKERS)
+        scorer.warmup()
+    except Exception as e:
+        print(f"❌ Error starting sharded inference workers: {e}")
+        return
+    if watcher_stop.is_set():
+        # The server shut down while the workers were starting
+        scorer.shutdown()
+        return
+    sharded_scorer = scorer
+    print(f"✅ Started {SHARD_WORKERS} sharded inference workers")
+
+def start_drift_monitor():
+    global drift_monitor
+    try:
+        reference = load_reference()
+        if reference is None:
+            print("⚠️ Drift reference not found, drift monitoring disabled (build it with python -m backend.drift)")
+            return
+        drift_monitor = DriftMonitor(reference)
+        drift_monitor.start()
+        print(f"✅ Monitoring drift on {len(drift_monitor.features)} features")
+    except Exception as e:
+        print(f"❌ Error starting drift monitor: {e}")
+        drift_monitor = None
+
+def start_shadow_scorer():
+    global shadow_scorer
+    if not SHADOW_MODEL_PATH:
+        return
+    try:
+        # Shadow work is dropped whenever an admission group is saturated
+        shadow_scorer = ShadowScorer(SHADOW_MODEL_PATH, is_busy=admission.is_busy)
+        shadow_scorer.start()
+        print(f"✅ Shadow scoring with {SHADOW_MODEL_PATH}")
+    except Exception as e:
+        print(f"❌ Error loading shadow model: {e}")
+        shadow_scorer = None
+
+def predict_proba_batch(df_prepared: pd.DataFrame) -> np.ndarray:
+    """
+    Score a prepared batch, sharding it across worker processes when it is large
+    """
+    if sharded_scorer is not None and len(df_prepared) >= SHARD_MIN_ROWS:
+        return sharded_scorer.predict_proba(df_prepared)
+    return model.predict_proba(df_prepared)
+
+def predict_proba_columns(columns: List[np.ndarray], n_rows: int) -> np.ndarray:
+    """
+    Score one numeric array per model feature without building a DataFrame
+    """
+    if sharded_scorer is not None and n_rows >= SHARD_MIN_ROWS:
+        return sharded_scorer.predict_proba_columns(columns)
+    return model.predict_proba(arrow_io.stack_columns(columns))
 
 @app.on_event("startup")
 async def startup_event():
-    load_data()
-    load_model()
+    global ready, startup_seconds
+    # Limited routes can never take every threadpool worker
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, admission.total_concurrency + RESERVED_THREADS)
+    
+    # Ready only when each step has succeeded, never from whatever state a failed step left behind
+    model_loaded = load_model()
+    catalog_loaded = restore_catalog_snapshot() or reload_catalog(force=True)
+    warmed_up = model_loaded and catalog_loaded and warmup_model()
+    start_job_workers()
+    # Worker warmup grows with the worker count, so it does not delay readiness
+    threading.Thread(target=start_sharded_scorer, name="shard-startup", daemon=True).start()
+    start_drift_monitor()
+    start_shadow_scorer()
+    if RELOAD_INTERVAL > 0:
+        threading.Thread(target=watch_data_files, name="catalog-watcher", daemon=True).start()
+    
+    ready = warmed_up
+    startup_seconds = round(time.perf_counter() - _startup_started, 3)
+    print(f"{'✅' if ready else '⚠️'} Startup finished in {startup_seconds}s (ready={ready})")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    watcher_stop.set()
+    if drift_monitor is not None:
+        drift_monitor.stop()
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+    if job_pool is not None:
+        job_pool.shutdown(wait=False, cancel_futures=True)
+    if sharded_scorer is not None:
+        sharded_scorer.shutdown()
 
 # Request/Response Models
 class PlanetQuery(BaseModel):
     query: str  # Can be ID or name
 
+class BulkPlanetQuery(BaseModel):
+    queries: List[Union[int, str]]  # IDs or names, matched exactly
+    stream: bool = False  # NDJSON, one line per query
+
+BULK_MAX_QUERIES = 100000  # for JSON responses; streamed responses are not limited
+BULK_STREAM_CHUNK = 10000
+
 class PlanetResult(BaseModel):
     id: int
     name: str
@@ -110,6 +401,24 @@ class SimulatedPlanetData(BaseModel):
     koi_srad: float
     koi_kepmag: float
 
+class SweepParameter(BaseModel):
+    name: str  # One of the SimulatedPlanetData fields
+    start: float
+    stop: float
+    steps: int = 25
+
+class SweepRequest(BaseModel):
+    base: SimulatedPlanetData
+    parameters: List[SweepParameter]  # One parameter for a curve, two for a surface
+
+class SimilarQuery(BaseModel):
+    queries: List[Union[int, str]]  # IDs or names
+    k: int = 10
+
+SIMILAR_MAX_K = 50
+# Caps queries x k, which keeps a batched response to a few MB
+SIMILAR_MAX_NEIGHBORS = 20000
+
 class PredictionResult(BaseModel):
     prediction: str
     probability_false_positive: float
@@ -124,7 +433,7 @@ async def root():
     return {
         "message": "Stellar Signal API",
         "status": "online",
-        "total_planets": len(df) if df is not None else 0,
+        "total_planets": len(catalog.df) if catalog is not None else 0,
         "model_loaded": model is not None
     }
 
@@ -132,64 +441,153 @@ async def root():
 async def health_check():
     return {
         "status": "healthy",
-        "data_loaded": df is not None and not df.empty,
-        "records": len(df) if df is not None else 0,
+        "ready": ready,
+        "startup_seconds": startup_seconds,
+        "data_loaded": catalog is not None and not catalog.empty,
+        "records": len(catalog.df) if catalog is not None else 0,
         "model_loaded": model is not None,
         "features": len(feature_columns) if feature_columns else 0
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness probe: the process is up and serving requests
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe: data and model are loaded and warmed up
+    """
+    body = {"ready": ready, "startup_seconds": startup_seconds}
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
 @app.post("/detect", response_model=PlanetResult)
 async def detect_planet(query: PlanetQuery):
     """
     Detect planet by ID or name and return prediction results
     """
-    if df is None or df.empty:
+    state = catalog
+    if state is None or state.empty:
         raise HTTPException(status_code=500, detail="Dataset not loaded")
     
     search_query = query.query.strip()
+    position = find_planet(state, search_query)
     
-    # Try to find by ID first (if numeric)
-    result = None
-    if search_query.isdigit():
-        result = df[df['id'] == int(search_query)]
-    
-    # If not found by ID, search by name (case-insensitive)
-    if result is None or result.empty:
-        result = df[df['name'].str.upper() == search_query.upper()]
-    
-    # If still not found, try partial match
-    if result is None or result.empty:
-        result = df[df['name'].str.contains(search_query, case=False, na=False)]
-    
-    if result.empty:
+    if position is None:
         raise HTTPException(
             status_code=404,
             detail=f"Planet '{search_query}' not found. Please check the ID or name."
         )
     
-    # Get the first match
-    planet = result.iloc[0]
-    
-    # Determine confidence level
-    prob = float(planet['probability_confirmed'])
-    if prob >= 0.8:
-        confidence = "High"
-    elif prob >= 0.5:
-        confidence = "Medium"
-    else:
-        confidence = "Low"
-    
-    # Determine if confirmed based on probability threshold (>0.5)
-    is_confirmed = prob > 0.5
-    
-    return PlanetResult(
-        id=int(planet['id']),
-        name=str(planet['name']),
-        predicted_disposition=str(planet['predicted_disposition']),
-        probability_confirmed=prob,
-        is_confirmed=is_confirmed,
-        confidence_level=confidence
-    )
+    return PlanetResult(**planet_result(state, position))
+
+def bulk_entries(state: CatalogState, queries: List[str], positions: np.ndarray) -> List[Dict]:
+    """
+    One entry per query in input order; unmatched queries get {"query": q, "found": false}
+    """
+    found = positions >= 0
+    records = iter(planet_records(state, positions[found]).to_dict('records'))
+    return [
+        {"query": q, "found": True, **next(records)} if is_found else {"query": q, "found": False}
+        for q, is_found in zip(queries, found)
+    ]
+
+def stream_bulk_results(state: CatalogState, queries: List[str], positions: np.ndarray):
+    """
+    NDJSON lines in input order, built a chunk at a time
+    """
+    for start in range(0, len(queries), BULK_STREAM_CHUNK):
+        entries = bulk_entries(state, queries[start:start + BULK_STREAM_CHUNK],
+                               positions[start:start + BULK_STREAM_CHUNK])
+        yield "\n".join(json.dumps(entry) for entry in entries) + "\n"
+
+def bulk_results(state: CatalogState, queries: List[str], positions: np.ndarray) -> JSONResponse:
+    # results[i] always answers queries[i]
+    found = positions >= 0
+    return JSONResponse({
+        "total": len(queries),
+        "found": int(found.sum()),
+        "results": bulk_entries(state, queries, positions),
+        "not_found": [q for q, is_found in zip(queries, found) if not is_found]
+    })
+
+@app.post("/detect/bulk")
+async def detect_planets_bulk(query: BulkPlanetQuery):
+    """
+    Resolve many IDs and names against the catalog in one vectorized lookup.
+    Results follow the input order, with found false for unknown queries,
+    which are also listed in not_found.
+    """
+    state = catalog
+    if state is None or state.empty:
+        raise HTTPException(status_code=500, detail="Dataset not loaded")
+    if not query.stream and len(query.queries) > BULK_MAX_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {BULK_MAX_QUERIES} queries per request; use stream=true for more"
+        )
+    
+    queries = [str(q).strip() for q in query.queries]
+    try:
+        positions = await run_in_threadpool(state.index.resolve, queries)
+        if query.stream:
+            return StreamingResponse(stream_bulk_results(state, queries, positions), media_type="application/x-ndjson")
+        return await run_in_threadpool(bulk_results, state, queries, positions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk lookup error: {str(e)}")
+
+@app.get("/detect/{planet_id}/explain")
+async def explain_planet(planet_id: str):
+    """
+    Explain a catalog object's score with its precomputed SHAP values
+    """
+    state = catalog
+    if state is None or state.empty:
+        raise HTTPException(status_code=500, detail="Dataset not loaded")
+    if state.shap is None:
+        raise HTTPException(status_code=503, detail="Explanations not available")
+    
+    position = find_planet(state, planet_id.strip(), partial=False)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Planet '{planet_id}' not found")
+    
+    planet = state.df.iloc[position]
+    return {
+        "id": int(planet['id']),
+        "name": str(planet['name']),
+        "probability_confirmed": float(planet['probability_confirmed']),
+        **explanation(feature_columns, state.shap[position], state.features[position])
+    }
+
+@app.post("/predict/explain")
+async def explain_predictions(data: List[SimulatedPlanetData]):
+    """
+    Explain ad-hoc inputs with SHAP values, computed in one batch and cached
+    """
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    if len(data) == 0:
+        return {"explanations": []}
+    
+    try:
+        df_prepared = prepare_input(pd.DataFrame([d.dict() for d in data]))
+        shap_rows = await run_in_threadpool(shap_cache.explain, model, df_prepared, cat_features)
+        values = df_prepared.to_numpy()
+        
+        return {
+            "explanations": [
+                {"input_data": d.dict(), **explanation(list(df_prepared.columns), row, vals)}
+                for d, row, vals in zip(data, shap_rows, values)
+            ]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Explanation error: {str(e)}")
 
 @app.post("/predict", response_model=PredictionResult)
 async def predict_planet(data: SimulatedPlanetData):
@@ -206,41 +604,90 @@ async def predict_planet(data: SimulatedPlanetData):
         
         # Prepare the data for the model
         df_prepared = prepare_input(df_input)
+        if drift_monitor is not None:
+            drift_monitor.observe_frame(df_prepared)
         
-        # Get prediction and probabilities
-        prediction = model.predict(df_prepared)[0]
+        # Get probabilities
+        # CatBoost returns [prob_class_0, prob_class_1]: class 0 = FALSE POSITIVE, class 1 = CANDIDATE
         probabilities = model.predict_proba(df_prepared)[0]
+        if shadow_scorer is not None:
+            shadow_scorer.submit("/predict", df_input, probabilities[1:])
         
-        # CatBoost typically returns [prob_class_0, prob_class_1]
-        # Assuming class 0 = FALSE POSITIVE, class 1 = CANDIDATE
-        prob_false_positive = float(probabilities[0])
-        prob_candidate = float(probabilities[1])
-        
-        # Determine predicted disposition
-        predicted_disposition = "CANDIDATE" if prediction == 1 else "FALSE POSITIVE"
-        
-        # Determine confidence level
-        if prob_candidate >= 0.8:
-            confidence = "High"
-        elif prob_candidate >= 0.5:
-            confidence = "Medium"
-        else:
-            confidence = "Low"
-        
-        # Determine if confirmed
-        is_confirmed = prob_candidate > 0.5
+        # The predicted class is CANDIDATE when its probability is above 0.5
+        return PredictionResult(**prediction_result(probabilities, input_dict))
         
-        return PredictionResult(
-            prediction=predicted_disposition,
-            probability_false_positive=prob_false_positive,
-            probability_candidate=prob_candidate,
-            confidence_level=confidence,
-            is_confirmed=is_confirmed,
-            input_data=input_dict
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.post("/predict/sweep")
+async def predict_sweep(request: SweepRequest):
+    """
+    Score a grid of inputs that varies one or two parameters around a base point.
+    Returns a 1D curve or 2D surface of candidate probabilities.
+    """
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    base = request.base.dict()
+    parameters = [(p.name, p.start, p.stop, p.steps) for p in request.parameters]
+    
+    # Same checks the embedded frontend backend gets from sweep_result
+    try:
+        check_sweep(base, parameters)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        # Build and score the whole grid at once, off the event loop
+        return await run_in_threadpool(
+            sweep_result, model, feature_columns, cat_features, base, parameters
         )
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Sweep prediction error: {str(e)}")
+
+def score_csv(contents: bytes) -> Dict:
+    """
+    Score an uploaded CSV and build the /predict_csv response
+    """
+    df_input = pd.read_csv(io.StringIO(contents.decode('utf-8')))
+    
+    # Prepare the data for the model
+    df_prepared = prepare_input(df_input)
+    if drift_monitor is not None:
+        drift_monitor.observe_frame(df_prepared)
+    
+    # Get probabilities; large batches are sharded across worker processes
+    probabilities = predict_proba_batch(df_prepared)
+    if shadow_scorer is not None:
+        shadow_scorer.submit("/predict_csv", df_input, probabilities[:, 1])
+    
+    # Add results to DataFrame
+    add_prediction_columns(df_input, probabilities)
+    
+    # Convert to native Python types for JSON serialization
+    results = []
+    for _, row in df_input.iterrows():
+        row_dict = {}
+        for col, val in row.items():
+            if pd.isna(val):
+                row_dict[col] = None
+            elif isinstance(val, (np.integer, np.int64, np.int32)):
+                row_dict[col] = int(val)
+            elif isinstance(val, (np.floating, np.float64, np.float32)):
+                row_dict[col] = float(val)
+            elif isinstance(val, (np.bool_, bool)):
+                row_dict[col] = bool(val)
+            else:
+                row_dict[col] = val
+        results.append(row_dict)
+    
+    return {
+        "total_rows": int(len(results)),
+        "confirmed_count": int(sum(probabilities[:, 1] > 0.5)),
+        "false_positive_count": int(sum(probabilities[:, 1] <= 0.5)),
+        "results": results
+    }
 
 @app.post("/predict_csv")
 async def predict_from_csv(file: UploadFile = File(...)):
@@ -253,58 +700,121 @@ async def predict_from_csv(file: UploadFile = File(...)):
     try:
         # Read the uploaded CSV file
         contents = await file.read()
-        df_input = pd.read_csv(io.StringIO(contents.decode('utf-8')))
         
-        # Prepare the data for the model
-        df_prepared = prepare_input(df_input)
-        
-        # Get predictions and probabilities
-        predictions = model.predict(df_prepared)
-        probabilities = model.predict_proba(df_prepared)
-        
-        # Add results to DataFrame
-        df_input['prediction'] = ['CANDIDATE' if p == 1 else 'FALSE POSITIVE' for p in predictions]
-        df_input['probability_false_positive'] = probabilities[:, 0].astype(float)
-        df_input['probability_candidate'] = probabilities[:, 1].astype(float)
-        df_input['is_confirmed'] = (probabilities[:, 1] > 0.5).astype(bool)
-        
-        # Convert to native Python types for JSON serialization
-        results = []
-        for _, row in df_input.iterrows():
-            row_dict = {}
-            for col, val in row.items():
-                if pd.isna(val):
-                    row_dict[col] = None
-                elif isinstance(val, (np.integer, np.int64, np.int32)):
-                    row_dict[col] = int(val)
-                elif isinstance(val, (np.floating, np.float64, np.float32)):
-                    row_dict[col] = float(val)
-                elif isinstance(val, (np.bool_, bool)):
-                    row_dict[col] = bool(val)
-                else:
-                    row_dict[col] = val
-            results.append(row_dict)
-        
-        return {
-            "total_rows": int(len(results)),
-            "confirmed_count": int(sum(probabilities[:, 1] > 0.5)),
-            "false_positive_count": int(sum(probabilities[:, 1] <= 0.5)),
-            "results": results
-        }
+        # Parsing, scoring and formatting run off the event loop so cheap routes stay responsive
+        return await run_in_threadpool(score_csv, contents)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CSV prediction error: {str(e)}")
 
+def score_arrow(body: bytes) -> bytes:
+    """
+    Score an Arrow IPC stream and return the predictions as an Arrow IPC stream
+    """
+    columns, n_rows = arrow_io.read_feature_columns(body, feature_columns)
+    if drift_monitor is not None:
+        drift_monitor.observe(dict(zip(feature_columns, columns)))
+    if n_rows == 0:
+        return arrow_io.write_predictions(np.empty((0, 2)))
+    return arrow_io.write_predictions(predict_proba_columns(columns, n_rows))
+
+@app.post("/predict_arrow")
+async def predict_from_arrow(request: Request):
+    """
+    Batch predict from an Arrow IPC stream of koi_* columns.
+    Returns probabilities and labels as an Arrow IPC stream, in input row order.
+    """
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    if cat_features or not feature_columns:
+        raise HTTPException(status_code=501, detail="Arrow input requires a numeric-only model")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(status_code=501, detail="pyarrow is not installed")
+    
+    body = await request.body()
+    try:
+        result = await run_in_threadpool(score_arrow, body)
+    except ValueError as e:
+        # pyarrow.ArrowInvalid is a ValueError
+        raise HTTPException(status_code=400, detail=f"Invalid Arrow input: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Arrow prediction error: {str(e)}")
+    
+    return Response(content=result, media_type=arrow_io.ARROW_STREAM_MEDIA_TYPE)
+
+@app.post("/jobs/predict_csv")
+async def submit_csv_job(file: UploadFile = File(...)):
+    """
+    Submit a CSV file for background scoring and return a job id to poll
+    """
+    if job_pool is None or job_store is None:
+        raise HTTPException(status_code=503, detail="Job workers not available")
+    
+    # SQLite calls stay off the event loop
+    job = await run_in_threadpool(job_store.create, file.filename)
+    
+    # Copy the upload to the job directory without blocking the event loop
+    def _save_upload():
+        with open(job["input_path"], "wb") as out:
+            shutil.copyfileobj(file.file, out, length=1024 * 1024)
+    
+    try:
+        await run_in_threadpool(_save_upload)
+    except Exception as e:
+        await run_in_threadpool(job_store.update, job["id"], status=jobs.FAILED,
+                                 error=f"Upload error: {str(e)}", finished_at=time.time())
+        raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
+    
+    try:
+        await run_in_threadpool(submit_scoring_job, job["id"])
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Job submission error: {str(e)}")
+    return jobs.job_summary(await run_in_threadpool(job_store.get, job["id"]))
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Get status and progress of a scoring job
+    """
+    if job_store is None:
+        raise HTTPException(status_code=503, detail="Job workers not available")
+    
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    
+    return jobs.job_summary(job)
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Download the scored CSV of a completed job
+    """
+    if job_store is None:
+        raise HTTPException(status_code=503, detail="Job workers not available")
+    
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    if job["status"] != jobs.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}")
+    
+    download_name = f"scored_{job['filename'] or 'predictions.csv'}"
+    return FileResponse(job["output_path"], media_type="text/csv", filename=download_name)
+
 @app.get("/planets/list")
 async def list_planets(limit: int = 100, offset: int = 0):
     """
     List available planets with pagination
     """
-    if df is None or df.empty:
+    state = catalog
+    if state is None or state.empty:
         raise HTTPException(status_code=500, detail="Dataset not loaded")
     
-    total = len(df)
-    planets = df.iloc[offset:offset+limit][['id', 'name', 'predicted_disposition']].to_dict('records')
+    total = len(state.df)
+    planets = state.df.iloc[offset:offset+limit][['id', 'name', 'predicted_disposition']].to_dict('records')
     
     return {
         "total": total,
@@ -313,37 +823,189 @@ async def list_planets(limit: int = 100, offset: int = 0):
         "planets": planets
     }
 
+def similar_planets(state: CatalogState, positions: List[int], k: int) -> List[List[Dict]]:
+    """
+    Nearest catalog objects of each given row, with their scores and distances
+    """
+    distances, neighbors = state.similarity.neighbors(positions, k)
+    # One vectorized lookup for every neighbour of every row, then split per row
+    records = planet_records(state, neighbors.ravel())
+    records["distance"] = distances.ravel()
+    records = records.to_dict('records')
+    width = neighbors.shape[1]
+    return [records[i * width:(i + 1) * width] for i in range(len(neighbors))]
+
+def similar_results(state: CatalogState, queries: List[Union[int, str]], positions: np.ndarray, k: int) -> Dict:
+    found = positions >= 0
+    planets = planet_records(state, positions[found]).to_dict('records')
+    return {
+        "k": k,
+        "results": [
+            {"query": q, "planet": planet, "similar": similar}
+            for q, planet, similar in zip([q for q, is_found in zip(queries, found) if is_found],
+                                          planets, similar_planets(state, positions[found], k))
+        ],
+        "not_found": [q for q, is_found in zip(queries, found) if not is_found]
+    }
+
+@app.get("/planets/{planet_id}/similar")
+async def get_similar_planets(planet_id: str, k: int = 10):
+    """
+    Find the k catalog objects closest to a planet in standardized koi_* feature space
+    """
+    state = catalog
+    if state is None or state.empty:
+        raise HTTPException(status_code=500, detail="Dataset not loaded")
+    if state.similarity is None:
+        raise HTTPException(status_code=503, detail="Similarity index not available")
+    if not 1 <= k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=422, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    
+    position = find_planet(state, planet_id.strip(), partial=False)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Planet '{planet_id}' not found")
+    
+    return {
+        "planet": planet_result(state, position),
+        "k": k,
+        "similar": similar_planets(state, [position], k)[0]
+    }
+
+@app.post("/planets/similar")
+async def get_similar_planets_batch(query: SimilarQuery):
+    """
+    Find the k closest catalog objects for many planets in one tree query.
+    Results follow the input order; unknown IDs or names are listed in not_found.
+    """
+    state = catalog
+    if state is None or state.empty:
+        raise HTTPException(status_code=500, detail="Dataset not loaded")
+    if state.similarity is None:
+        raise HTTPException(status_code=503, detail="Similarity index not available")
+    if not 1 <= query.k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=422, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    if len(query.queries) * query.k > SIMILAR_MAX_NEIGHBORS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {SIMILAR_MAX_NEIGHBORS} neighbours (queries x k) per request"
+        )
+    
+    queries = [str(q).strip() for q in query.queries]
+    try:
+        positions = await run_in_threadpool(state.index.resolve, queries)
+        content = await run_in_threadpool(similar_results, state, queries, positions, query.k)
+        # Rendered off the event loop too; FastAPI's own encoding of a large dict would block it
+        return await run_in_threadpool(JSONResponse, content)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similarity error: {str(e)}")
+
 @app.get("/stats")
 async def get_statistics():
     """
     Get dataset statistics
     """
-    if df is None or df.empty:
+    state = catalog
+    if state is None or state.empty:
         raise HTTPException(status_code=500, detail="Dataset not loaded")
     
-    # Count based on probability threshold (>0.5 = confirmed candidate)
-    confirmed = len(df[df['probability_confirmed'] > 0.5])
-    false_positive = len(df[df['probability_confirmed'] <= 0.5])
-    avg_probability = df['probability_confirmed'].mean()
-    
-    # Also count by disposition string (for reference)
-    disposition_candidates = len(df[df['predicted_disposition'].str.upper() == 'CANDIDATE'])
-    disposition_false_positives = len(df[df['predicted_disposition'].str.upper() == 'FALSE POSITIVE'])
+    # Precomputed when the catalog is loaded
+    return state.stats
+
+@app.post("/admin/reload", status_code=202)
+async def trigger_reload(background_tasks: BackgroundTasks):
+    """
+    Rebuild the catalog from disk in the background and swap it in when ready
+    """
+    if reload_lock.locked():
+        raise HTTPException(status_code=409, detail="Reload already in progress")
     
+    background_tasks.add_task(reload_catalog, True)
+    return {"status": "reloading"}
+
+@app.get("/admin/reload")
+async def get_reload_status():
+    """
+    Get the state of catalog reloading
+    """
+    state = catalog
     return {
-        "total_objects": len(df),
-        "confirmed_candidates": confirmed,
-        "false_positives": false_positive,
-        "average_probability": round(avg_probability, 4),
-        "high_confidence": len(df[df['probability_confirmed'] >= 0.8]),
-        "medium_confidence": len(df[(df['probability_confirmed'] >= 0.5) & (df['probability_confirmed'] < 0.8)]),
-        "low_confidence": len(df[df['probability_confirmed'] < 0.5]),
-        "disposition_stats": {
-            "candidates": disposition_candidates,
-            "false_positives": disposition_false_positives
-        }
+        "reloading": reload_lock.locked(),
+        "records": len(state.df) if state is not None else 0,
+        "loaded_at": state.loaded_at if state is not None else None,
+        "watch_interval": RELOAD_INTERVAL,
+        **reload_status
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Admission control metrics: active requests, queue depth and rejections per route group
+    """
+    return {
+        "admission": admission.metrics(),
+        "threadpool_tokens": to_thread.current_default_thread_limiter().total_tokens
     }
 
+@app.get("/monitoring/drift")
+async def get_drift_report():
+    """
+    Drift of served koi_* inputs against the training data: PSI, KS distance and quantiles per feature
+    """
+    if drift_monitor is None:
+        raise HTTPException(status_code=503, detail="Drift monitoring not available")
+    
+    return await run_in_threadpool(drift_monitor.report)
+
+@app.post("/monitoring/drift/reset")
+async def reset_drift_report():
+    """
+    Start a new drift observation window
+    """
+    if drift_monitor is None:
+        raise HTTPException(status_code=503, detail="Drift monitoring not available")
+    
+    drift_monitor.reset()
+    return {"status": "reset", "since": drift_monitor.since}
+
+@app.get("/shadow/report")
+async def get_shadow_report():
+    """
+    Compare the shadow model with the primary model on live traffic: agreement rate and probability deltas
+    """
+    if shadow_scorer is None:
+        raise HTTPException(status_code=503, detail="Shadow scoring not enabled")
+    
+    return shadow_scorer.report()
+
+@app.post("/shadow/reset")
+async def reset_shadow_report():
+    """
+    Clear the shadow comparison statistics
+    """
+    if shadow_scorer is None:
+        raise HTTPException(status_code=503, detail="Shadow scoring not enabled")
+    
+    shadow_scorer.reset()
+    return {"status": "reset", "since": shadow_scorer.since}
+
+@app.get("/debug/memory")
+async def get_memory_usage():
+    """
+    Report bytes used by each catalog column, index and derived array
+    """
+    state = catalog
+    if state is None or state.empty:
+        raise HTTPException(status_code=500, detail="Dataset not loaded")
+    
+    report = memory_report(state)
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux
+        report["process_max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        report["process_max_rss_bytes"] = None
+    return report
+
 @app.get("/model/info")
 async def get_model_info():
     """
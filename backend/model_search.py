@@ -0,0 +1,386 @@
+"""
+Parallel hyperparameter search for the KOI classifier.
+
+Reproduces the notebook's training data (labeled KOIs, medians filled from the
+labeled rows, stratified 75/25 split with random_state=42). The notebook's 25%
+test rows are split again into validation rows and a holdout. The training and
+validation pools are quantized once and saved to disk. Trials then run in a
+process pool: every worker loads the saved pools once and trains candidate
+models with early stopping on the validation pool, without re-quantizing the
+data from a DataFrame each time.
+
+Each trial's validation accuracy, F1, training time and inference latency are
+appended to a results CSV, and the best trial is picked on those, either by F1
+alone or within a latency budget / with a latency penalty. Validation rows
+drive early stopping and selection, so their scores flatter the winner; it is
+only promoted to catboost_model.cbm if it also beats the current model on the
+holdout, which no trial has seen.
+
+Run from the repository root:
+    python -m backend.model_search --trials 40
+    python -m backend.model_search --trials 0 --promote --max-latency-ms 0.5
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model
+from backend.score_store import medians_path, save_medians, training_medians
+from backend.snapshot import source_fingerprint
+
+NASA_PATH = "ml-pipeline/dataset/NASA_data_set.xlsx"
+MODEL_PATH = "ml-pipeline/model/catboost_model.cbm"
+SEARCH_DIR = "ml-pipeline/search"
+
+BORDER_COUNT = 254  # CatBoost's CPU default, so trials match the notebook quantization
+EARLY_STOPPING_ROUNDS = 50
+MAX_ITERATIONS = 3000
+LATENCY_REPEATS = 200
+HOLDOUT_FRACTION = 0.5  # of the notebook's test rows
+
+# Sampled independently per trial; border_count is fixed by the cached pools
+SEARCH_SPACE = {
+    "depth": [4, 5, 6, 7, 8],
+    "learning_rate": [0.01, 0.02, 0.03, 0.05, 0.08, 0.1],
+    "l2_leaf_reg": [1, 3, 5, 7, 10],
+    "random_strength": [0.5, 1, 2],
+    "bagging_temperature": [0, 0.5, 1],
+}
+
+RESULT_COLUMNS = [
+    "trial", "params", "best_iteration", "tree_count", "accuracy", "precision", "recall", "f1",
+    "train_seconds", "latency_ms", "batch_us_per_row", "model_path",
+]
+
+
+def load_training_data(path: str, feature_columns):
+    """Labeled KOIs split the way the notebook splits them: (X_train, X_val, y_train, y_val)."""
+    from sklearn.model_selection import train_test_split
+
+    raw = pd.read_excel(path) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path)
+    raw.columns = raw.columns.str.strip()
+    labeled = raw[raw["koi_disposition"] != "CANDIDATE"]
+
+    y = (labeled["koi_disposition"] == "CONFIRMED").astype(int)
+    X = labeled[list(feature_columns)]
+    X = X.fillna(X.median())
+    return train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+
+
+def split_holdout(X_test: pd.DataFrame, y_test: pd.Series, fraction: float = HOLDOUT_FRACTION):
+    """Split the notebook's test rows into (X_val, X_holdout, y_val, y_holdout)."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(X_test, y_test, test_size=fraction, random_state=42, stratify=y_test)
+
+
+def _paths(search_dir: str) -> dict:
+    return {
+        "train": os.path.join(search_dir, "train.quantized"),
+        "val": os.path.join(search_dir, "val.quantized"),
+        "borders": os.path.join(search_dir, "borders.tsv"),
+        "val_arrays": os.path.join(search_dir, "val.npz"),
+        "holdout_arrays": os.path.join(search_dir, "holdout.npz"),
+        "meta": os.path.join(search_dir, "pools.json"),
+        "results": os.path.join(search_dir, "trials.csv"),
+        "models": os.path.join(search_dir, "models"),
+    }
+
+
+def build_pools(source_path: str, feature_columns, search_dir: str = SEARCH_DIR,
+                border_count: int = BORDER_COUNT) -> dict:
+    """
+    Quantize the training and validation pools once and save them with the
+    holdout rows, reusing them while the source table, features, border count
+    and holdout fraction are unchanged.
+    """
+    from catboost import Pool
+
+    paths = _paths(search_dir)
+    meta = {
+        "source": [list(entry) for entry in source_fingerprint(source_path)],
+        "feature_columns": list(feature_columns),
+        "border_count": border_count,
+        "holdout_fraction": HOLDOUT_FRACTION,
+    }
+    if os.path.exists(paths["meta"]):
+        with open(paths["meta"]) as f:
+            if json.load(f) == meta and all(os.path.exists(paths[k])
+                                            for k in ("train", "val", "val_arrays", "holdout_arrays")):
+                return paths
+
+    os.makedirs(search_dir, exist_ok=True)
+    started = time.perf_counter()
+    X_train, X_test, y_train, y_test = load_training_data(source_path, feature_columns)
+    X_val, X_holdout, y_val, y_holdout = split_holdout(X_test, y_test)
+
+    train_pool = Pool(X_train, y_train)
+    train_pool.quantize(border_count=border_count)
+    train_pool.save(paths["train"])
+    train_pool.save_quantization_borders(paths["borders"])
+
+    # Validation rows must use the training borders
+    val_pool = Pool(X_val, y_val)
+    val_pool.quantize(input_borders=paths["borders"])
+    val_pool.save(paths["val"])
+
+    # Raw validation rows for scoring, the way the API sees them
+    np.savez(paths["val_arrays"], X=X_val.to_numpy(dtype=np.float32), y=y_val.to_numpy())
+    # Never given to trials; only read when deciding on promotion
+    np.savez(paths["holdout_arrays"], X=X_holdout.to_numpy(dtype=np.float32), y=y_holdout.to_numpy())
+
+    with open(paths["meta"], "w") as f:
+        json.dump(meta, f)
+    print(f"Quantized {len(X_train):,} train / {len(X_val):,} validation rows "
+          f"({len(X_holdout):,} holdout rows kept aside) in {time.perf_counter() - started:.1f}s")
+    return paths
+
+
+def sample_params(n_trials: int, seed: int):
+    """Distinct random draws from SEARCH_SPACE."""
+    rng = np.random.default_rng(seed)
+    trials, seen = [], set()
+    max_distinct = int(np.prod([len(v) for v in SEARCH_SPACE.values()]))
+    while len(trials) < min(n_trials, max_distinct):
+        params = {name: values[rng.integers(len(values))] for name, values in SEARCH_SPACE.items()}
+        params = {k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+    return trials
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """Accuracy plus precision/recall/F1 of the CONFIRMED class."""
+    tp = int(np.sum((y_pred == 1) & (y_true == 1)))
+    fp = int(np.sum((y_pred == 1) & (y_true == 0)))
+    fn = int(np.sum((y_pred == 0) & (y_true == 1)))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "accuracy": float(np.mean(y_pred == y_true)),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def inference_cost(model, X: np.ndarray, repeats: int = LATENCY_REPEATS) -> dict:
+    """
+    Median single-row latency (what /predict pays) and per-row cost of one
+    batch call (what /predict_csv pays), both on one thread.
+    """
+    row = X[:1]
+    model.predict_proba(row, thread_count=1)  # warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        model.predict_proba(row, thread_count=1)
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    model.predict_proba(X, thread_count=1)
+    batch_seconds = time.perf_counter() - started
+    return {
+        "latency_ms": float(np.median(timings) * 1e3),
+        "batch_us_per_row": batch_seconds / len(X) * 1e6,
+    }
+
+
+def evaluate(model, X_val: np.ndarray, y_val: np.ndarray) -> dict:
+    y_pred = (model.predict_proba(X_val)[:, 1] >= 0.5).astype(int)
+    return {**classification_metrics(y_val, y_pred), **inference_cost(model, X_val)}
+
+
+_train_pool = None
+_val_pool = None
+_val_X = None
+_val_y = None
+
+
+def _init_search_worker(train_path: str, val_path: str, val_arrays_path: str):
+    """Load the quantized pools once per worker process."""
+    global _train_pool, _val_pool, _val_X, _val_y
+    from catboost import Pool
+
+    _train_pool = Pool("quantized://" + train_path)
+    _val_pool = Pool("quantized://" + val_path)
+    arrays = np.load(val_arrays_path)
+    _val_X, _val_y = arrays["X"], arrays["y"]
+
+
+def _run_trial(trial: int, params: dict, model_path: str, thread_count: int) -> dict:
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier(
+        **params,
+        iterations=MAX_ITERATIONS,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        use_best_model=True,
+        random_seed=42,
+        thread_count=thread_count,
+        verbose=0,
+        # Parallel trials would otherwise share one catboost_info/ directory in the working dir
+        allow_writing_files=False,
+    )
+    started = time.perf_counter()
+    model.fit(_train_pool, eval_set=_val_pool)
+    train_seconds = time.perf_counter() - started
+    model.save_model(model_path)
+
+    return {
+        "trial": trial,
+        "params": json.dumps(params, sort_keys=True),
+        "best_iteration": model.get_best_iteration(),
+        "tree_count": model.tree_count_,
+        **evaluate(model, _val_X, _val_y),
+        "train_seconds": train_seconds,
+        "model_path": model_path,
+    }
+
+
+def next_trial_number(results_path: str) -> int:
+    if not os.path.exists(results_path):
+        return 0
+    trials = pd.to_numeric(pd.read_csv(results_path, usecols=["trial"])["trial"], errors="coerce")
+    return int(trials.max()) + 1 if trials.notna().any() else 0
+
+
+def append_result(results_path: str, result: dict):
+    """Append one row, so partial searches can be inspected and promoted from."""
+    header = not os.path.exists(results_path)
+    pd.DataFrame([result], columns=RESULT_COLUMNS).to_csv(results_path, mode="a", header=header, index=False)
+
+
+def holdout_result(model_path: str, paths: dict, trial) -> dict:
+    """A model's metrics on the holdout rows, which no trial trained, stopped or was ranked on."""
+    model, _, _ = load_catboost_model(model_path)
+    arrays = np.load(paths["holdout_arrays"])
+    return {
+        "trial": trial,
+        "tree_count": model.tree_count_,
+        **evaluate(model, arrays["X"], arrays["y"]),
+        "model_path": model_path,
+    }
+
+
+def run_search(paths: dict, n_trials: int, workers: int, threads_per_worker: int, seed: int):
+    os.makedirs(paths["models"], exist_ok=True)
+    first = next_trial_number(paths["results"])
+    trials = sample_params(n_trials, seed + first)
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_search_worker,
+        initargs=(paths["train"], paths["val"], paths["val_arrays"]),
+    )
+    with pool:
+        futures = {
+            pool.submit(_run_trial, first + i, params,
+                        os.path.join(paths["models"], f"trial_{first + i:04d}.cbm"), threads_per_worker): params
+            for i, params in enumerate(trials)
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Trial {futures[future]} failed: {e}")
+                continue
+            append_result(paths["results"], result)
+            print(f"Trial {result['trial']}: F1 {result['f1']:.4f}, accuracy {result['accuracy']:.4f}, "
+                  f"{result['tree_count']} trees, {result['train_seconds']:.1f}s train, "
+                  f"{result['latency_ms']:.3f} ms/row latency")
+
+
+def select_trial(results: pd.DataFrame, max_latency_ms: float = None, latency_weight: float = 0.0) -> pd.Series:
+    """
+    Pick the trial to promote: highest F1 minus latency_weight * latency_ms,
+    among trials within max_latency_ms when a budget is given.
+    Ties go to the faster model.
+    """
+    candidates = results
+    if max_latency_ms is not None:
+        candidates = candidates[candidates["latency_ms"] <= max_latency_ms]
+    if candidates.empty:
+        raise ValueError("No trial meets the latency budget")
+    objective = candidates["f1"] - latency_weight * candidates["latency_ms"]
+    ranked = candidates.assign(objective=objective).sort_values(["objective", "latency_ms"],
+                                                                ascending=[False, True])
+    return ranked.iloc[0]
+
+
+def promote(trial_model_path: str, model_path: str = MODEL_PATH):
+    """Copy beside the production model and rename, so readers never see a partial file."""
+    tmp_path = model_path + ".tmp"
+    shutil.copyfile(trial_model_path, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel CatBoost hyperparameter search")
+    parser.add_argument("--source", default=NASA_PATH)
+    parser.add_argument("--model", default=MODEL_PATH, help="Production model (features, baseline, promotion target)")
+    parser.add_argument("--search-dir", default=SEARCH_DIR)
+    parser.add_argument("--trials", type=int, default=20, help="New trials to run (0 to only promote)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--promote", action="store_true", help="Copy the selected trial to --model")
+    parser.add_argument("--max-latency-ms", type=float, default=None,
+                        help="Only promote trials with a median single-row latency under this")
+    parser.add_argument("--latency-weight", type=float, default=0.0,
+                        help="F1 points given up per ms of single-row latency")
+    args = parser.parse_args()
+
+    _, feature_columns, _ = load_catboost_model(args.model)
+    paths = build_pools(args.source, feature_columns, args.search_dir)
+
+    if args.trials > 0:
+        workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads_per_worker)
+        run_search(paths, args.trials, workers, args.threads_per_worker, args.seed)
+
+    if not os.path.exists(paths["results"]):
+        print("⚠️ No trials recorded yet")
+        return
+
+    results = pd.read_csv(paths["results"])
+    print("Validation (used for early stopping and selection):")
+    print(results.sort_values("f1", ascending=False)[
+        ["trial", "f1", "accuracy", "tree_count", "train_seconds", "latency_ms", "batch_us_per_row"]
+    ].head(10).to_string(index=False))
+
+    try:
+        best = select_trial(results, args.max_latency_ms, args.latency_weight)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        return
+    print(f"Selected trial {best['trial']}: validation F1 {best['f1']:.4f}, "
+          f"{best['latency_ms']:.3f} ms/row latency")
+
+    # The unbiased comparison: both models on rows the search never saw
+    holdout = pd.DataFrame([holdout_result(best["model_path"], paths, best["trial"]),
+                            holdout_result(args.model, paths, "current")])
+    print("Holdout:")
+    print(holdout[["trial", "f1", "accuracy", "precision", "recall", "latency_ms"]].to_string(index=False))
+    objective = holdout["f1"] - args.latency_weight * holdout["latency_ms"]
+    if args.promote:
+        if objective.iloc[0] <= objective.iloc[1]:
+            print("✅ The current model is still the best choice on the holdout; nothing promoted")
+        else:
+            promote(best["model_path"], args.model)
+            save_medians(training_medians(args.source, feature_columns), medians_path(args.model))
+            print(f"✅ Promoted {best['model_path']} to {args.model}. "
+                  "Rescore the catalog and restart the API to serve it.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Incremental re-scoring of the KOI catalog.
+
+The score store keeps, for every scored KOI, a hash of its prepared feature
+vector and the version (content hash) of the model that scored it. A rescoring
+run hashes the incoming catalog, runs CatBoost only on rows whose features or
+model changed, merges the new scores into the store and exports the
+results.csv / candidate_planet_predictions.csv files the API serves.
+
+Missing values are filled with the medians the model was trained with, saved
+beside the model as <model>.medians.json, never with medians of the incoming
+catalog: those move with every update and would change (and rescore) rows
+whose own values did not change.
+
+Run from the repository root:
+    python -m backend.score_store --catalog ml-pipeline/dataset/NASA_data_set.xlsx
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model, prepare_features
+
+MODEL_PATH = "ml-pipeline/model/catboost_model.cbm"
+TRAINING_SOURCE_PATH = "ml-pipeline/dataset/NASA_data_set.xlsx"
+SCORE_DB_PATH = "backend/data/scores.sqlite3"
+RESULTS_PATH = "backend/data/results.csv"
+FEATURES_OUT_PATH = "ml-pipeline/results/candidate_planet_predictions.csv"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    name TEXT PRIMARY KEY,
+    id INTEGER NOT NULL,
+    feature_hash INTEGER NOT NULL,
+    model_version TEXT NOT NULL,
+    probability_confirmed REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def medians_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".medians.json"
+
+
+def training_medians(source_path: str, feature_columns) -> pd.Series:
+    """Medians of the labeled (non-candidate) rows, as the notebook fills them before training."""
+    raw = pd.read_excel(source_path) if source_path.endswith((".xlsx", ".xls")) else pd.read_csv(source_path)
+    raw.columns = raw.columns.str.strip()
+    labeled = raw[raw["koi_disposition"] != "CANDIDATE"]
+    return labeled[list(feature_columns)].median()
+
+
+def save_medians(medians: pd.Series, path: str):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({name: float(value) for name, value in medians.items()}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_medians(path: str) -> pd.Series:
+    with open(path) as f:
+        return pd.Series(json.load(f), dtype=np.float64)
+
+
+def model_version(model_path: str) -> str:
+    """
+    Content hash of a model file and its training medians, so a retrained
+    model or new fill values invalidate old scores.
+    """
+    digest = hashlib.sha256()
+    for path in (model_path, medians_path(model_path)):
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def feature_hashes(df_prepared: pd.DataFrame) -> np.ndarray:
+    """64-bit hash of each prepared feature row (stored as signed for SQLite)."""
+    return pd.util.hash_pandas_object(df_prepared, index=False).to_numpy().view(np.int64)
+
+
+def disposition_labels(probabilities: np.ndarray) -> np.ndarray:
+    """Same thresholds as the training notebook."""
+    return np.select(
+        [probabilities >= 0.75, probabilities >= 0.5],
+        ["Confirmed", "Planetary Candidate"],
+        default="FALSE POSITIVE",
+    )
+
+
+def load_catalog(path: str, medians: pd.Series) -> pd.DataFrame:
+    """
+    Read the KOI table and reproduce the notebook preprocessing:
+    missing features are filled with the training medians and only
+    CANDIDATE rows are kept for scoring.
+    """
+    raw = pd.read_excel(path) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path)
+    raw.columns = raw.columns.str.strip()
+
+    columns = [name for name in medians.index if name in raw.columns]
+    raw[columns] = raw[columns].fillna(medians[columns])
+    if "koi_disposition" in raw.columns:
+        raw = raw[raw["koi_disposition"] == "CANDIDATE"]
+
+    return raw.rename(columns={"kepid": "id", "kepoi_name": "name"}).reset_index(drop=True)
+
+
+class ScoreStore:
+    """SQLite table of per-KOI scores keyed by name."""
+
+    def __init__(self, db_path: str = SCORE_DB_PATH):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(_SCHEMA)
+
+    def load(self) -> pd.DataFrame:
+        with sqlite3.connect(self.db_path) as conn:
+            return pd.read_sql_query(
+                "SELECT name, feature_hash, model_version, probability_confirmed FROM scores", conn
+            )
+
+    def upsert(self, rows: pd.DataFrame):
+        now = time.time()
+        # tolist() converts numpy scalars to Python types sqlite3 can bind
+        records = zip(
+            rows["name"].tolist(),
+            rows["id"].astype(np.int64).tolist(),
+            rows["feature_hash"].astype(np.int64).tolist(),
+            rows["model_version"].tolist(),
+            rows["probability_confirmed"].astype(float).tolist(),
+            [now] * len(rows),
+        )
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores "
+                "(name, id, feature_hash, model_version, probability_confirmed, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                records,
+            )
+
+    def prune(self, keep_names) -> int:
+        """Delete scores for KOIs no longer in the catalog."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TEMP TABLE keep (name TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO keep VALUES (?)", ((n,) for n in keep_names))
+            cursor = conn.execute("DELETE FROM scores WHERE name NOT IN (SELECT name FROM keep)")
+            return cursor.rowcount
+
+
+def rescore(catalog: pd.DataFrame, store: ScoreStore, model, feature_columns, cat_features,
+            version: str, full: bool = False) -> pd.DataFrame:
+    """
+    Score only new or changed catalog rows and merge them into the store.
+    Returns the catalog with probability_confirmed and predicted_disposition.
+    """
+    prepared = prepare_features(catalog, feature_columns, cat_features)
+    current = pd.DataFrame({
+        "name": catalog["name"].to_numpy(),
+        "id": catalog["id"].to_numpy(),
+        "feature_hash": feature_hashes(prepared),
+    })
+
+    stored = store.load()
+    merged = current.merge(stored, on="name", how="left", suffixes=("", "_stored"))
+    changed = (
+        full
+        | merged["probability_confirmed"].isna()
+        | (merged["feature_hash_stored"] != merged["feature_hash"])
+        | (merged["model_version"] != version)
+    ).to_numpy()
+
+    if changed.any():
+        probabilities = model.predict_proba(prepared[changed])[:, 1]
+        merged.loc[changed, "probability_confirmed"] = probabilities
+        merged.loc[changed, "model_version"] = version
+        store.upsert(merged.loc[changed])
+
+    print(f"Rescored {int(changed.sum()):,} of {len(merged):,} rows (model {version})")
+
+    scored = catalog.copy()
+    scored["probability_confirmed"] = merged["probability_confirmed"].to_numpy(dtype=float)
+    scored["predicted_disposition"] = disposition_labels(scored["probability_confirmed"].to_numpy())
+    return scored
+
+
+def export(scored: pd.DataFrame, feature_columns, results_path: str = RESULTS_PATH,
+           features_path: str = FEATURES_OUT_PATH):
+    """Write the API catalog and the row-aligned feature file (used for explanations)."""
+    leading = ["koi_disposition"] if "koi_disposition" in scored.columns else []
+    feature_out = scored[leading + list(feature_columns) + ["predicted_disposition", "probability_confirmed"]]
+    _write_csv_atomic(feature_out, features_path)
+
+    # Written last: the API reloads when results.csv changes
+    _write_csv_atomic(scored[["id", "name", "predicted_disposition", "probability_confirmed"]], results_path)
+
+
+def _write_csv_atomic(frame: pd.DataFrame, path: str):
+    """Write beside the target and rename, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally rescore the KOI catalog")
+    parser.add_argument("--catalog", required=True, help="KOI table (.xlsx or .csv)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--training-source", default=TRAINING_SOURCE_PATH,
+                        help="Labeled KOI table the model was trained on; only read when "
+                             "the model has no saved medians yet")
+    parser.add_argument("--db", default=SCORE_DB_PATH)
+    parser.add_argument("--results-out", default=RESULTS_PATH)
+    parser.add_argument("--features-out", default=FEATURES_OUT_PATH)
+    parser.add_argument("--full", action="store_true", help="Rescore every row")
+    parser.add_argument("--prune", action="store_true", help="Drop stored scores missing from the catalog")
+    args = parser.parse_args()
+
+    model, feature_columns, cat_features = load_catboost_model(args.model)
+    fill_path = medians_path(args.model)
+    if not os.path.exists(fill_path):
+        save_medians(training_medians(args.training_source, feature_columns), fill_path)
+        print(f"✅ Saved training medians to {fill_path}")
+    catalog = load_catalog(args.catalog, load_medians(fill_path))
+    store = ScoreStore(args.db)
+    scored = rescore(catalog, store, model, feature_columns, cat_features,
+                     model_version(args.model), full=args.full)
+
+    if args.prune:
+        removed = store.prune(catalog["name"])
+        print(f"Pruned {removed:,} rows no longer in the catalog")
+
+    export(scored, feature_columns, args.results_out, args.features_out)
+    print(f"✅ Wrote {len(scored):,} rows to {args.results_out} and {args.features_out}")
+
+
+if __name__ == "__main__":
+    main()
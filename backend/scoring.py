@@ -0,0 +1,143 @@
+import pandas as pd
+import numpy as np
+
+SWEEP_MAX_STEPS = 200
+
+
+def load_catboost_model(model_path: str):
+    """
+    Load a CatBoost model and return it with its training metadata:
+    (model, feature_columns, cat_features)
+    """
+    from catboost import CatBoostClassifier
+
+    model = CatBoostClassifier()
+    model.load_model(model_path)
+
+    feature_columns = list(getattr(model, 'feature_names_', None) or [])
+    cat_features = model.get_param('cat_features')
+    if cat_features is None:
+        cat_features = []
+
+    return model, feature_columns, cat_features
+
+
+def prepare_features(df_input: pd.DataFrame, feature_columns, cat_features) -> pd.DataFrame:
+    """
+    Prepares any DataFrame to feed the trained CatBoost model:
+    - Keeps only training features
+    - Reorders columns
+    - Fills missing features with 0
+    - Converts categorical features to strings
+    """
+    if feature_columns is None or len(feature_columns) == 0:
+        return df_input
+
+    # Keep only features that the model expects
+    df_prepared = df_input.reindex(columns=feature_columns, fill_value=0)
+
+    # Convert categorical features to string type
+    for col in cat_features:
+        if col in df_prepared.columns:
+            df_prepared[col] = df_prepared[col].astype(str)
+
+    return df_prepared
+
+
+def add_prediction_columns(df_input: pd.DataFrame, probabilities: np.ndarray) -> pd.DataFrame:
+    """
+    Append the prediction columns returned by /predict_csv to a DataFrame.
+    Class 1 (CANDIDATE) is predicted when its probability is above 0.5.
+    """
+    is_confirmed = probabilities[:, 1] > 0.5
+    df_input['prediction'] = np.where(is_confirmed, 'CANDIDATE', 'FALSE POSITIVE')
+    df_input['probability_false_positive'] = probabilities[:, 0].astype(float)
+    df_input['probability_candidate'] = probabilities[:, 1].astype(float)
+    df_input['is_confirmed'] = is_confirmed
+    return df_input
+
+
+def confidence_level(probability: float) -> str:
+    """Confidence bucket shown for a candidate probability."""
+    if probability >= 0.8:
+        return "High"
+    elif probability >= 0.5:
+        return "Medium"
+    return "Low"
+
+
+def predict_one(model, feature_columns, cat_features, input_dict: dict) -> np.ndarray:
+    """
+    [P(false positive), P(candidate)] for a single input. Numeric models are
+    scored from a plain array, skipping DataFrame construction.
+    """
+    if cat_features or not feature_columns:
+        df_prepared = prepare_features(pd.DataFrame([input_dict]), feature_columns, cat_features)
+        return model.predict_proba(df_prepared)[0]
+    row = np.array([[input_dict.get(col, 0) for col in feature_columns]], dtype=float)
+    return model.predict_proba(row)[0]
+
+
+def prediction_result(probabilities, input_dict: dict) -> dict:
+    """The /predict response for one row of [P(false positive), P(candidate)]."""
+    prob_candidate = float(probabilities[1])
+    return {
+        "prediction": "CANDIDATE" if prob_candidate > 0.5 else "FALSE POSITIVE",
+        "probability_false_positive": float(probabilities[0]),
+        "probability_candidate": prob_candidate,
+        "confidence_level": confidence_level(prob_candidate),
+        "is_confirmed": prob_candidate > 0.5,
+        "input_data": input_dict,
+    }
+
+
+def sweep_frame(base: dict, parameters):
+    """
+    Grid of inputs varying one or two (name, start, stop, steps) parameters
+    around a base point. Returns the axis values and one row per grid point.
+    """
+    fields = list(base.keys())
+    axes = [np.linspace(start, stop, steps) for _, start, stop, steps in parameters]
+    grids = np.meshgrid(*axes, indexing='ij')
+    # Every row is the base point with the swept values substituted
+    matrix = np.tile(np.array([base[f] for f in fields], dtype=float), (grids[0].size, 1))
+    for (name, _, _, _), grid in zip(parameters, grids):
+        matrix[:, fields.index(name)] = grid.ravel()
+    return axes, pd.DataFrame(matrix, columns=fields)
+
+
+def check_sweep(base: dict, parameters):
+    """
+    Raise ValueError unless the (name, start, stop, steps) parameters are one or
+    two distinct fields of the base point, each with 2 to SWEEP_MAX_STEPS steps.
+    """
+    names = [name for name, _, _, _ in parameters]
+    if not 1 <= len(names) <= 2:
+        raise ValueError("Sweep takes one or two parameters")
+    if len(set(names)) != len(names):
+        raise ValueError("Sweep parameters must be distinct")
+    for name, _, _, steps in parameters:
+        if name not in base:
+            raise ValueError(f"Unknown parameter '{name}'")
+        if not 2 <= steps <= SWEEP_MAX_STEPS:
+            raise ValueError(f"Steps for '{name}' must be between 2 and {SWEEP_MAX_STEPS}")
+
+
+def sweep_result(model, feature_columns, cat_features, base: dict, parameters) -> dict:
+    """
+    The /predict/sweep response: a 1D curve or 2D surface of P(candidate) over
+    the sweep grid. Raises ValueError for parameters check_sweep rejects.
+    """
+    check_sweep(base, parameters)
+    axes, df_grid = sweep_frame(base, parameters)
+    df_prepared = prepare_features(df_grid, feature_columns, cat_features)
+    shape = [len(axis) for axis in axes]
+    probabilities = model.predict_proba(df_prepared)[:, 1].reshape(shape)
+    return {
+        "base": base,
+        "parameters": [
+            {"name": name, "values": axis.tolist()} for (name, _, _, _), axis in zip(parameters, axes)
+        ],
+        "shape": shape,
+        "probability_candidate": probabilities.tolist(),
+    }
@@ -0,0 +1,173 @@
+"""
+Shadow scoring of live traffic with a candidate model.
+
+Copies of /predict and /predict_csv inputs are handed, together with the
+primary model's probabilities, to a background thread that scores them with
+the shadow model and records how often the two agree and how far their
+probabilities differ. Submitting never blocks the request: work is shed when
+the queue is full or the API is busy, so the primary response never waits
+on the shadow model. All statistics use constant memory.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model, prepare_features
+
+SHADOW_MODEL_PATH = os.environ.get("STELLAR_SHADOW_MODEL_PATH")
+SHADOW_QUEUE_SIZE = int(os.environ.get("STELLAR_SHADOW_QUEUE_SIZE", "64"))
+# Large batches are uniformly subsampled before queueing
+SHADOW_SAMPLE_ROWS = int(os.environ.get("STELLAR_SHADOW_SAMPLE_ROWS", "20000"))
+# Shadow inference stays on one thread so it cannot crowd out primary requests
+SHADOW_THREADS = int(os.environ.get("STELLAR_SHADOW_THREADS", "1"))
+
+DELTA_BINS = [0.0, 0.01, 0.05, 0.1, 0.25, 0.5]
+RECENT_DISAGREEMENTS = 20
+
+
+class ShadowScorer:
+    """Background comparison of a shadow model against the primary model."""
+
+    def __init__(self, model_path: str, is_busy: Optional[Callable[[], bool]] = None,
+                 queue_size: int = SHADOW_QUEUE_SIZE, sample_rows: int = SHADOW_SAMPLE_ROWS):
+        self.model_path = model_path
+        self.model, self.feature_columns, self.cat_features = load_catboost_model(model_path)
+        self.is_busy = is_busy
+        self.sample_rows = sample_rows
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.submitted = 0
+        self.shed_full = 0
+        self.shed_busy = 0
+        self.errors = 0
+        self.last_error = None
+        self._reset()
+
+    def _reset(self):
+        self.batches = 0
+        self.rows = 0
+        self.agreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.delta_counts = np.zeros(len(DELTA_BINS), dtype=np.int64)
+        self.routes = {}
+        self.score_seconds = 0.0
+        self.recent_disagreements = deque(maxlen=RECENT_DISAGREEMENTS)
+        self.since = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def submit(self, route: str, df_input: pd.DataFrame, primary_probabilities: np.ndarray):
+        """
+        Queue a copy of the raw inputs and the primary P(candidate) for shadow scoring.
+        Never blocks; returns False when the work was shed.
+        """
+        if len(df_input) == 0:
+            return False
+        if self.is_busy is not None and self.is_busy():
+            with self._lock:
+                self.shed_busy += 1
+            return False
+        if len(df_input) > self.sample_rows:
+            rows = np.sort(np.random.default_rng().choice(len(df_input), self.sample_rows, replace=False))
+            df_input, primary_probabilities = df_input.iloc[rows], primary_probabilities[rows]
+        try:
+            self._queue.put_nowait((route, df_input.copy(), np.array(primary_probabilities, dtype=np.float64)))
+        except queue.Full:
+            with self._lock:
+                self.shed_full += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                route, df_input, primary = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                self._score(route, df_input, primary)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = str(e)
+
+    def _score(self, route: str, df_input: pd.DataFrame, primary: np.ndarray):
+        started = time.perf_counter()
+        df_prepared = prepare_features(df_input, self.feature_columns, self.cat_features)
+        shadow = self.model.predict_proba(df_prepared, thread_count=SHADOW_THREADS)[:, 1]
+        elapsed = time.perf_counter() - started
+
+        delta = shadow - primary
+        abs_delta = np.abs(delta)
+        agree = (shadow > 0.5) == (primary > 0.5)
+        with self._lock:
+            self.batches += 1
+            self.rows += len(delta)
+            self.agreements += int(agree.sum())
+            self.delta_sum += float(delta.sum())
+            self.abs_delta_sum += float(abs_delta.sum())
+            self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+            self.delta_counts += np.bincount(np.searchsorted(DELTA_BINS, abs_delta, side='right') - 1,
+                                             minlength=len(DELTA_BINS))
+            counts = self.routes.setdefault(route, {"rows": 0, "agreements": 0})
+            counts["rows"] += len(delta)
+            counts["agreements"] += int(agree.sum())
+            self.score_seconds += elapsed
+            for i in np.flatnonzero(~agree)[:RECENT_DISAGREEMENTS]:
+                self.recent_disagreements.append({
+                    "route": route,
+                    "probability_primary": float(primary[i]),
+                    "probability_shadow": float(shadow[i]),
+                    "input_data": {k: (None if pd.isna(v) else v.item() if isinstance(v, np.generic) else v)
+                                   for k, v in df_input.iloc[i].items()},
+                })
+
+    def report(self) -> Dict:
+        with self._lock:
+            rows = self.rows
+            labels = [f"{lo}-{hi}" for lo, hi in zip(DELTA_BINS[:-1], DELTA_BINS[1:])] + [f">={DELTA_BINS[-1]}"]
+            return {
+                "shadow_model_path": self.model_path,
+                "since": self.since,
+                "submitted_batches": self.submitted,
+                "scored_batches": self.batches,
+                "rows": rows,
+                "queued_batches": self._queue.qsize(),
+                "shed_queue_full": self.shed_full,
+                "shed_busy": self.shed_busy,
+                "errors": self.errors,
+                "last_error": self.last_error,
+                "agreement_rate": self.agreements / rows if rows else None,
+                "mean_delta": self.delta_sum / rows if rows else None,
+                "mean_abs_delta": self.abs_delta_sum / rows if rows else None,
+                "max_abs_delta": self.max_abs_delta if rows else None,
+                "abs_delta_histogram": dict(zip(labels, self.delta_counts.tolist())),
+                "routes": {
+                    route: {**counts, "agreement_rate": counts["agreements"] / counts["rows"]}
+                    for route, counts in self.routes.items()
+                },
+                "shadow_us_per_row": self.score_seconds / rows * 1e6 if rows else None,
+                "recent_disagreements": list(self.recent_disagreements),
+            }
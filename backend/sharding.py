@@ -0,0 +1,130 @@
+"""
+Sharded multi-process inference for large batches.
+
+The prepared feature matrix is written once into shared memory. A persistent
+pool of worker processes, each with the model already loaded, scores
+contiguous row ranges of that matrix and writes the probabilities straight
+into their slice of a shared output buffer, so results come back in input
+order without pickling or concatenating per-shard arrays.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from backend.scoring import load_catboost_model
+
+# Opt-in: in-process predict_proba already uses every core, and sharding has only been
+# measured slower (0.53x on 1 CPU). Fewer than 2 workers means callers score in-process.
+SHARD_WORKERS = int(os.environ.get("STELLAR_SHARD_WORKERS", "0"))
+MIN_SHARD_WORKERS = 2
+SHARD_MIN_ROWS = int(os.environ.get("STELLAR_SHARD_MIN_ROWS", "200000"))
+
+# CatBoost works on float32 internally, so nothing is lost by sharing float32
+INPUT_DTYPE = np.float32
+OUTPUT_DTYPE = np.float64
+N_CLASSES = 2
+
+_shard_model = None
+
+
+def _init_shard_worker(model_path: str):
+    """Load the model once per worker process."""
+    global _shard_model
+    _shard_model, _, _ = load_catboost_model(model_path)
+
+
+def _score_shard(input_name: str, output_name: str, shape, start: int, stop: int, thread_count: int):
+    input_shm = SharedMemory(name=input_name)
+    output_shm = SharedMemory(name=output_name)
+    try:
+        inputs = np.ndarray(shape, dtype=INPUT_DTYPE, buffer=input_shm.buf)
+        outputs = np.ndarray((shape[0], N_CLASSES), dtype=OUTPUT_DTYPE, buffer=output_shm.buf)
+        outputs[start:stop] = _shard_model.predict_proba(inputs[start:stop], thread_count=thread_count)
+        # Views must be released before the shared memory can be closed
+        del inputs, outputs
+    finally:
+        input_shm.close()
+        output_shm.close()
+    return stop - start
+
+
+def shard_bounds(n_rows: int, n_shards: int):
+    """Split [0, n_rows) into n_shards contiguous, nearly equal ranges."""
+    n_shards = max(1, min(n_shards, n_rows))
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+class ShardedScorer:
+    """Persistent process pool scoring prepared frames in shared memory."""
+
+    def __init__(self, model_path: str, workers: int = SHARD_WORKERS, threads_per_worker: int = 1):
+        if workers < MIN_SHARD_WORKERS:
+            raise ValueError(f"Sharding needs at least {MIN_SHARD_WORKERS} workers, got {workers}")
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_shard_worker,
+            initargs=(model_path,),
+        )
+
+    def warmup(self):
+        """Make sure every worker has started and loaded the model."""
+        list(self.pool.map(_noop, range(self.workers)))
+
+    def predict_proba(self, df_prepared: pd.DataFrame) -> np.ndarray:
+        """Score an already prepared, all-numeric frame. Returns (n_rows, 2) probabilities."""
+        return self.predict_proba_columns(
+            [df_prepared[col].to_numpy(dtype=INPUT_DTYPE, na_value=np.nan) for col in df_prepared.columns]
+        )
+
+    def predict_proba_columns(self, columns) -> np.ndarray:
+        """Score one 1D numeric array per model feature, in model feature order."""
+        n_rows, n_features = (len(columns[0]) if columns else 0), len(columns)
+        if n_rows == 0:
+            return np.empty((0, N_CLASSES), dtype=OUTPUT_DTYPE)
+
+        shape = (n_rows, n_features)
+        input_shm = SharedMemory(create=True, size=n_rows * n_features * np.dtype(INPUT_DTYPE).itemsize)
+        output_shm = SharedMemory(create=True, size=n_rows * N_CLASSES * np.dtype(OUTPUT_DTYPE).itemsize)
+        try:
+            # Fill the shared matrix column by column, straight from the source arrays
+            inputs = np.ndarray(shape, dtype=INPUT_DTYPE, buffer=input_shm.buf)
+            for j, column in enumerate(columns):
+                inputs[:, j] = column
+            del inputs
+
+            futures = [
+                self.pool.submit(_score_shard, input_shm.name, output_shm.name, shape,
+                                 start, stop, self.threads_per_worker)
+                for start, stop in shard_bounds(n_rows, self.workers)
+            ]
+            for future in futures:
+                future.result()
+
+            # The segment is unmapped and unlinked before returning, so the result is
+            # copied out once: 16 bytes per row, against 44 bytes per row of input that
+            # are never copied back. Returning a view would leak the segment until
+            # every array derived from it is released.
+            outputs = np.ndarray((n_rows, N_CLASSES), dtype=OUTPUT_DTYPE, buffer=output_shm.buf)
+            probabilities = outputs.copy()
+            del outputs
+            return probabilities
+        finally:
+            input_shm.close()
+            input_shm.unlink()
+            output_shm.close()
+            output_shm.unlink()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _noop(_):
+    return _shard_model is not None
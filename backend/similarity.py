@@ -0,0 +1,56 @@
+"""
+Nearest catalog objects in standardized feature space.
+
+The koi_* feature rows (aligned with the catalog) are z-scored with the
+catalog's own mean and standard deviation and indexed in a k-d tree when the
+catalog loads, so a neighbour query costs O(log n) instead of a scan of every
+row. Missing values are replaced by the column median before scaling.
+"""
+from typing import Tuple
+
+import numpy as np
+
+LEAF_SIZE = 16
+
+
+class SimilarityIndex:
+    """k-d tree over standardized feature rows, queried by catalog row position."""
+
+    def __init__(self, features: np.ndarray):
+        from scipy.spatial import cKDTree
+
+        values = np.asarray(features, dtype=np.float64)
+        medians = np.nanmedian(values, axis=0)
+        values = np.where(np.isnan(values), medians, values)
+        self.mean = values.mean(axis=0)
+        std = values.std(axis=0)
+        self.scale = np.where(std > 0, std, 1.0)
+        self.tree = cKDTree((values - self.mean) / self.scale, leafsize=LEAF_SIZE)
+
+    def __len__(self):
+        return self.tree.n
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.tree.data.nbytes + self.tree.indices.nbytes)
+
+    def neighbors(self, positions, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest other rows of each given row, closest first.
+        Returns (distances, positions), each of shape (len(positions), k).
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        k = max(min(k, len(self) - 1), 0)
+        if k == 0 or len(positions) == 0:
+            return np.empty((len(positions), k)), np.empty((len(positions), k), dtype=np.intp)
+
+        # One extra neighbour, since every row is its own nearest neighbour
+        distances, found = self.tree.query(self.tree.data[positions], k=k + 1)
+        distances, found = distances.reshape(len(positions), -1), found.reshape(len(positions), -1)
+
+        # Drop the query row; when exact duplicates tie with it, it may not be first
+        is_self = found == positions[:, None]
+        drop = np.where(is_self.any(axis=1), is_self.argmax(axis=1), k)
+        keep = np.ones_like(found, dtype=bool)
+        keep[np.arange(len(positions)), drop] = False
+        return distances[keep].reshape(len(positions), k), found[keep].reshape(len(positions), k)
@@ -0,0 +1,67 @@
+"""
+Prebuilt startup snapshot of the catalog and everything derived from it.
+
+Parsing results.csv, building lookup indexes and computing explanations is
+done once; the result is pickled together with a fingerprint of the source
+files. A starting replica restores the snapshot instead of rebuilding, as long
+as the fingerprint still matches.
+
+Build it offline with the following, which also rebuilds the drift reference
+from the training data:
+    python -m backend.snapshot
+"""
+import os
+import pickle
+
+SNAPSHOT_PATH = os.environ.get("STELLAR_SNAPSHOT_PATH", "backend/data/catalog_snapshot.pkl")
+SNAPSHOT_VERSION = 2
+
+
+def source_fingerprint(*paths: str) -> tuple:
+    """Size and modification time of every source file."""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+def save_snapshot(fingerprint: tuple, state: dict, path: str = SNAPSHOT_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(
+            {"version": SNAPSHOT_VERSION, "fingerprint": fingerprint, "state": state},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(fingerprint: tuple, path: str = SNAPSHOT_PATH):
+    """Return the snapshot state, or None when missing or built from other sources."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        snapshot = pickle.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("fingerprint") != fingerprint:
+        return None
+    return snapshot["state"]
+
+
+if __name__ == "__main__":
+    from backend import main
+
+    main.load_model()
+    main.reload_catalog(force=True)
+
+    from backend.drift import DRIFT_REFERENCE_PATH, save_reference, training_reference
+    from backend.model_search import NASA_PATH
+
+    try:
+        save_reference(training_reference(NASA_PATH, main.MODEL_PATH))
+        print(f"✅ Saved drift reference to {DRIFT_REFERENCE_PATH}")
+    except Exception as e:
+        print(f"⚠️ Could not build drift reference: {e}")
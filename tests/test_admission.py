@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.admission import AdmissionController, AdmissionLimit, AdmissionMiddleware
+
+SCOPE = {"type": "http", "path": "/work", "method": "POST"}
+
+
+def middleware(app, max_concurrent=1, max_queue=1):
+    limit = AdmissionLimit(["/work"], max_concurrent=max_concurrent, max_queue=max_queue)
+    return AdmissionMiddleware(app, AdmissionController({"work": limit})), limit
+
+
+def client(disconnect_after=None):
+    """
+    receive/send pair: one body message, then a disconnect after a delay, never (None),
+    or, like uvicorn, as soon as the response is complete ("response").
+    """
+    sent = []
+    body_read = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal body_read
+        if not body_read:
+            body_read = True
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+        if disconnect_after == "response":
+            await response_complete.wait()
+        elif disconnect_after is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
+
+    return receive, send, sent
+
+
+async def respond(send, status=200):
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_disconnect_holds_slot_until_thread_finishes():
+    finished = threading.Event()
+
+    def work():
+        time.sleep(0.3)
+        finished.set()
+
+    async def app(scope, receive, send):
+        await run_in_threadpool(work)
+        await respond(send)
+
+    async def main():
+        mw, limit = middleware(app)
+        receive, send, _ = client(disconnect_after=0.05)
+        task = asyncio.ensure_future(mw(SCOPE, receive, send))
+        await asyncio.sleep(0.15)
+        # Disconnected, but the worker thread is still running
+        assert limit.active == 1
+        assert not task.done()
+        await task
+        assert finished.is_set()
+        return limit
+
+    limit = asyncio.run(main())
+    assert limit.active == 0
+    assert limit.cancelled == 1
+
+
+def test_disconnect_cancels_async_work_immediately():
+    async def app(scope, receive, send):
+        await asyncio.sleep(10)
+        await respond(send)
+
+    async def main():
+        mw, limit = middleware(app)
+        receive, send, sent = client(disconnect_after=0.05)
+        started = time.perf_counter()
+        await mw(SCOPE, receive, send)
+        return limit, sent, time.perf_counter() - started
+
+    limit, sent, elapsed = asyncio.run(main())
+    assert elapsed < 1
+    assert sent == []
+    assert limit.active == 0
+    assert limit.cancelled == 1
+
+
+def test_disconnect_after_complete_response_is_not_cancelled():
+    finished = []
+
+    async def app(scope, receive, send):
+        await respond(send)
+        # Work after the response (e.g. background tasks) still runs to the end
+        await asyncio.sleep(0.1)
+        finished.append(True)
+
+    async def main():
+        mw, limit = middleware(app)
+        receive, send, sent = client(disconnect_after="response")
+        await mw(SCOPE, receive, send)
+        return limit, sent
+
+    limit, sent = asyncio.run(main())
+    assert sent[0]["status"] == 200
+    assert finished == [True]
+    assert limit.cancelled == 0
+    assert limit.active == 0
+    assert limit.admitted == 1
+
+
+def test_full_group_is_rejected_with_retry_after():
+    release = None
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await respond(send)
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        mw, limit = middleware(app, max_concurrent=1, max_queue=0)
+        first = asyncio.ensure_future(mw(SCOPE, *client()[:2]))
+        await asyncio.sleep(0.05)
+        receive, send, rejected = client()
+        await mw(SCOPE, receive, send)
+        release.set()
+        await first
+        return limit, rejected
+
+    limit, rejected = asyncio.run(main())
+    assert rejected[0]["status"] == 503
+    assert (b"retry-after", b"5") in rejected[0]["headers"]
+    assert limit.rejected == 1
+    assert limit.active == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.catalog import CatalogIndex, build_catalog, find_planet
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "id": [100, 200, 100, 300, 555, 400],
+        "name": ["K00001.01", "K00002.01", "K00003.01", "123", "K00005.01", "555"],
+        "predicted_disposition": ["Confirmed", "FALSE POSITIVE", "Planetary Candidate",
+                                  "Confirmed", "FALSE POSITIVE", "Confirmed"],
+        "probability_confirmed": [0.9, 0.1, 0.6, 0.95, 0.2, 0.85],
+    })
+
+
+def test_resolve_mixes_ids_and_names_in_input_order(frame):
+    index = CatalogIndex(frame)
+    queries = [200, "300", " k00001.01 ", "K00002.01", "123", "missing", "K00005.01"]
+    np.testing.assert_array_equal(index.resolve(queries), [1, 3, 0, 1, 3, -1, 4])
+
+
+def test_resolve_duplicates(frame):
+    index = CatalogIndex(frame)
+    # Duplicate catalog ids resolve to their first row; repeated queries resolve independently
+    np.testing.assert_array_equal(index.resolve([100, "100", 100, "K00003.01"]), [0, 0, 0, 2])
+
+
+def test_resolve_prefers_ids_over_numeric_names(frame):
+    index = CatalogIndex(frame)
+    # "555" is both the id of row 4 and the name of row 5; ids win, as in /detect
+    np.testing.assert_array_equal(index.resolve(["555", "400"]), [4, 5])
+    # Too long to be an int64 id, so only tried as a name
+    np.testing.assert_array_equal(index.resolve(["9" * 25]), [-1])
+
+
+def test_non_ascii_digits_are_names_not_ids(frame):
+    index = CatalogIndex(frame)
+    # str.isdigit() accepts these, but they are not int64 ids
+    np.testing.assert_array_equal(index.resolve(["²", "１００", "١٠٠", "200"]), [-1, -1, -1, 1])
+
+
+def test_find_planet_ignores_non_ascii_digits(frame, tmp_path):
+    path = tmp_path / "results.csv"
+    frame.to_csv(path, index=False)
+    state = build_catalog(str(path), ())
+    assert find_planet(state, "²", partial=False) is None
+    assert find_planet(state, "9" * 25, partial=False) is None
+    assert find_planet(state, "200") == 1
+
+
+def test_bulk_results_are_aligned_with_queries(frame, tmp_path):
+    from backend.main import bulk_entries
+
+    path = tmp_path / "results.csv"
+    frame.to_csv(path, index=False)
+    state = build_catalog(str(path), ())
+    queries = ["K00002.01", "nope", "100", "nope", "123"]
+
+    entries = bulk_entries(state, queries, state.index.resolve(queries))
+    assert [entry["query"] for entry in entries] == queries
+    assert [entry["found"] for entry in entries] == [True, False, True, False, True]
+    assert [entry.get("name") for entry in entries] == ["K00002.01", None, "K00001.01", None, "123"]
+    assert entries[1] == {"query": "nope", "found": False}
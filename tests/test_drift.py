@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.drift import DriftMonitor, FeatureHistogram, build_reference, psi
+
+
+def drain(monitor):
+    """Merge everything queued, as the background thread would."""
+    batches = []
+    while not monitor._queue.empty():
+        batches.append(monitor._queue.get_nowait())
+    monitor._update(batches)
+
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return build_reference(pd.DataFrame({"koi_prad": rng.normal(0, 1, 20000),
+                                         "koi_depth": rng.normal(0, 1, 20000)}))
+
+
+def test_psi_matches_hand_computed_value():
+    expected = np.array([0.5, 0.5])
+    actual = np.array([0.25, 0.75])
+    assert psi(expected, actual) == pytest.approx(0.25 * np.log(2) + 0.25 * np.log(1.5))
+    assert psi(expected, expected) == 0
+
+
+def test_unshifted_inputs_are_stable(reference):
+    monitor = DriftMonitor(reference)
+    rng = np.random.default_rng(1)
+    monitor.observe({"koi_prad": rng.normal(0, 1, 20000), "koi_depth": rng.normal(0, 1, 20000)})
+    drain(monitor)
+
+    report = monitor.report()
+    assert report["rows"] == 20000
+    assert report["features"]["koi_prad"]["status"] == "stable"
+    assert report["max_psi"] < 0.1
+    assert report["drifted_features"] == []
+
+
+def test_known_shift_is_significant(reference):
+    monitor = DriftMonitor(reference)
+    rng = np.random.default_rng(2)
+    # One standard deviation of shift in one feature only
+    for _ in range(4):
+        monitor.observe({"koi_prad": rng.normal(1, 1, 5000), "koi_depth": rng.normal(0, 1, 5000)})
+    drain(monitor)
+
+    report = monitor.report()
+    shifted = report["features"]["koi_prad"]
+    assert report["batches"] == 4
+    assert shifted["psi"] > 0.25
+    assert shifted["status"] == "significant"
+    assert shifted["quantiles"]["0.5"] == pytest.approx(1.0, abs=0.1)
+    assert report["features"]["koi_depth"]["status"] == "stable"
+    assert report["drifted_features"] == ["koi_prad"]
+
+
+def test_queued_batches_hold_bin_counts_not_rows(reference):
+    monitor = DriftMonitor(reference, sample_rows=1000, queue_size=1)
+    values = np.random.default_rng(3).normal(0, 1, 100000)
+    monitor.observe({"koi_prad": values, "koi_depth": values})
+    monitor.observe({"koi_prad": values, "koi_depth": values})
+
+    rows, names, batch = monitor._queue.get_nowait()
+    assert rows == 1000
+    assert names == ("koi_prad", "koi_depth")
+    assert isinstance(batch["koi_prad"], FeatureHistogram)
+    assert batch["koi_prad"].count == 1000
+    assert monitor.report()["dropped_batches"] == 1
+
+
+def test_small_frames_are_queued_raw_and_binned_later(reference):
+    monitor = DriftMonitor(reference)
+    frame = pd.DataFrame({"koi_depth": [0.5, 2.0], "koi_period": [3.0, 4.0], "koi_prad": [1.0, -1.0]})
+    monitor.observe_frame(frame)
+    monitor.observe_frame(frame.iloc[:1])
+
+    rows, names, batch = monitor._queue.queue[0]
+    assert rows == 2
+    assert names == ("koi_prad", "koi_depth")
+    np.testing.assert_array_equal(batch, [[1.0, 0.5], [-1.0, 2.0]])
+
+    drain(monitor)
+    report = monitor.report()
+    assert report["rows"] == 3
+    assert report["batches"] == 2
+    assert monitor.histograms["koi_prad"].count == 3
@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from backend import jobs
+
+
+@pytest.fixture
+def store(tmp_path):
+    return jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def make_job(store, status, finished_ago=None):
+    job = store.create("upload.csv")
+    with open(job["input_path"], "w") as f:
+        f.write("koi_period\n1.0\n")
+    fields = {"status": status}
+    if finished_ago is not None:
+        fields["finished_at"] = time.time() - finished_ago
+    store.update(job["id"], **fields)
+    return job
+
+
+def test_purge_removes_only_expired_finished_jobs(store):
+    old_done = make_job(store, jobs.COMPLETED, finished_ago=7200)
+    old_failed = make_job(store, jobs.FAILED, finished_ago=7200)
+    recent = make_job(store, jobs.COMPLETED, finished_ago=60)
+    running = make_job(store, jobs.RUNNING)
+
+    assert store.purge_finished(3600) == 2
+    for job in (old_done, old_failed):
+        assert store.get(job["id"]) is None
+        assert not os.path.exists(os.path.dirname(job["input_path"]))
+    for job in (recent, running):
+        assert store.get(job["id"]) is not None
+        assert os.path.exists(job["input_path"])
+
+
+class BrokenPool:
+    def submit(self, *args):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, **kwargs):
+        self.shut_down = True
+
+
+class WorkingPool:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+        return Future()
+
+
+def test_broken_pool_is_replaced(store, monkeypatch):
+    import backend.main as main
+
+    broken, replacement = BrokenPool(), WorkingPool()
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setattr(main, "job_pool", broken)
+    monkeypatch.setattr(jobs, "create_job_pool", lambda *args, **kwargs: replacement)
+
+    job = store.create("upload.csv")
+    main.submit_scoring_job(job["id"])
+    assert broken.shut_down
+    assert main.job_pool is replacement
+    assert replacement.submitted[0][0] == job["id"]
+    assert store.get(job["id"])["status"] == jobs.QUEUED
+
+
+def test_job_is_failed_when_it_cannot_be_submitted(store, monkeypatch):
+    import backend.main as main
+
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setattr(main, "job_pool", BrokenPool())
+    monkeypatch.setattr(jobs, "create_job_pool", lambda *args, **kwargs: BrokenPool())
+
+    job = store.create("upload.csv")
+    with pytest.raises(BrokenProcessPool):
+        main.submit_scoring_job(job["id"])
+    row = store.get(job["id"])
+    assert row["status"] == jobs.FAILED
+    assert row["finished_at"] is not None
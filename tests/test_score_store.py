@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from backend.score_store import ScoreStore, load_catalog, rescore
+
+FEATURES = ["koi_period", "koi_depth", "koi_prad"]
+MEDIANS = pd.Series({"koi_period": 10.0, "koi_depth": 500.0, "koi_prad": 2.0})
+
+
+class CountingModel:
+    """Scores a row as a fixed function of its features and records how many rows it saw."""
+
+    def __init__(self):
+        self.scored = 0
+
+    def predict_proba(self, df_prepared):
+        self.scored += len(df_prepared)
+        p = 1 / (1 + np.exp(-df_prepared["koi_prad"].to_numpy(dtype=float) / 10))
+        return np.column_stack([1 - p, p])
+
+
+def koi_table(n_candidates=50, n_labeled=50, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_candidates + n_labeled
+    table = pd.DataFrame({
+        "kepid": np.arange(n) + 1000,
+        "kepoi_name": [f"K{i:05d}.01" for i in range(n)],
+        "koi_disposition": ["CANDIDATE"] * n_candidates + ["CONFIRMED", "FALSE POSITIVE"] * (n_labeled // 2),
+        "koi_period": rng.uniform(1, 100, n),
+        "koi_depth": rng.uniform(10, 5000, n),
+        "koi_prad": rng.uniform(0.5, 20, n),
+    })
+    # Missing values in every fifth row, candidates included
+    table.loc[::5, "koi_prad"] = np.nan
+    return table
+
+
+def run(table, tmp_path, store, model, version="v1"):
+    path = tmp_path / "koi.csv"
+    table.to_csv(path, index=False)
+    return rescore(load_catalog(str(path), MEDIANS), store, model, FEATURES, [], version)
+
+
+def test_delta_rescoring_only_scores_changed_rows(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.sqlite3"))
+    table = koi_table()
+
+    model = CountingModel()
+    first = run(table, tmp_path, store, model)
+    assert model.scored == 50
+
+    # One candidate changes; labeled rows change too, which must not move the fill values
+    table.loc[3, "koi_depth"] += 1.0
+    table.loc[60:, "koi_prad"] *= 3.0
+    model = CountingModel()
+    second = run(table, tmp_path, store, model)
+    assert model.scored == 1
+
+    unchanged = second.index != 3
+    np.testing.assert_allclose(second.loc[unchanged, "probability_confirmed"],
+                               first.loc[unchanged, "probability_confirmed"])
+
+
+def test_missing_values_use_training_medians(tmp_path):
+    path = tmp_path / "koi.csv"
+    koi_table().to_csv(path, index=False)
+    catalog = load_catalog(str(path), MEDIANS)
+    assert len(catalog) == 50
+    assert (catalog.loc[::5, "koi_prad"] == MEDIANS["koi_prad"]).all()
+
+
+def test_new_model_version_rescores_everything(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.sqlite3"))
+    table = koi_table()
+    run(table, tmp_path, store, CountingModel(), version="v1")
+
+    model = CountingModel()
+    run(table, tmp_path, store, model, version="v2")
+    assert model.scored == 50
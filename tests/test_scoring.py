@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from backend.scoring import SWEEP_MAX_STEPS, sweep_result
+
+
+class SumModel:
+    """P(candidate) is the row sum, so every grid point can be checked by hand."""
+
+    def predict_proba(self, df):
+        total = df.to_numpy().sum(axis=1)
+        return np.column_stack([1 - total, total])
+
+
+BASE = {"koi_period": 1.0, "koi_prad": 2.0, "koi_depth": 3.0}
+
+
+def test_sweep_surface_varies_the_parameters_around_the_base():
+    result = sweep_result(SumModel(), list(BASE), [], BASE,
+                          [("koi_prad", 0.0, 1.0, 3), ("koi_depth", 10.0, 20.0, 2)])
+
+    assert result["shape"] == [3, 2]
+    assert result["parameters"] == [{"name": "koi_prad", "values": [0.0, 0.5, 1.0]},
+                                    {"name": "koi_depth", "values": [10.0, 20.0]}]
+    np.testing.assert_allclose(result["probability_candidate"], [[11, 21], [11.5, 21.5], [12, 22]])
+
+
+@pytest.mark.parametrize("parameters, message", [
+    ([], "one or two"),
+    ([("koi_prad", 0, 1, 3)] * 3, "one or two"),
+    ([("koi_prad", 0, 1, 3), ("koi_prad", 0, 1, 3)], "distinct"),
+    ([("koi_teq", 0, 1, 3)], "Unknown parameter 'koi_teq'"),
+    ([("koi_prad", 0, 1, 1)], "between 2"),
+    ([("koi_prad", 0, 1, SWEEP_MAX_STEPS + 1)], "between 2"),
+])
+def test_invalid_sweeps_are_rejected(parameters, message):
+    with pytest.raises(ValueError, match=message):
+        sweep_result(SumModel(), list(BASE), [], BASE, parameters)
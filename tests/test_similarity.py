@@ -0,0 +1,49 @@
+import numpy as np
+
+from backend.similarity import SimilarityIndex
+
+
+def brute_force(index, position, k):
+    points = index.tree.data
+    distances = np.linalg.norm(points - points[position], axis=1)
+    distances[position] = np.inf
+    return np.sort(distances)[:k]
+
+
+def test_neighbors_exclude_the_query_row():
+    features = np.random.default_rng(0).normal(size=(500, 4))
+    index = SimilarityIndex(features)
+    positions = np.arange(0, 500, 7)
+
+    distances, found = index.neighbors(positions, 5)
+    assert found.shape == distances.shape == (len(positions), 5)
+    assert not (found == positions[:, None]).any()
+    assert (np.diff(distances, axis=1) >= 0).all()
+    for row, position in enumerate(positions):
+        np.testing.assert_allclose(distances[row], brute_force(index, position, 5))
+
+
+def test_exact_duplicates_are_neighbours_but_never_themselves():
+    features = np.random.default_rng(1).normal(size=(100, 3))
+    features[1] = features[0]
+    features[2] = features[0]
+    index = SimilarityIndex(features)
+
+    distances, found = index.neighbors([0, 1, 2], 2)
+    for row, position in enumerate([0, 1, 2]):
+        assert position not in found[row]
+        assert set(found[row]) == {0, 1, 2} - {position}
+        np.testing.assert_array_equal(distances[row], [0, 0])
+
+
+def test_missing_values_and_small_catalogs():
+    features = np.array([[1.0, np.nan], [2.0, 5.0], [3.0, 6.0]])
+    index = SimilarityIndex(features)
+
+    distances, found = index.neighbors([0], 10)
+    assert found.shape == (1, 2)
+    assert 0 not in found[0]
+    assert np.isfinite(distances).all()
+
+    distances, found = index.neighbors([], 3)
+    assert found.shape == (0, 2)